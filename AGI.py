@@ -1,144 +1,538 @@
 import threading
-import time
-import importlib
 import os
 import json
+import queue
 import random
+from rule_matcher import RuleMatcher, RuleSet
+from state_journal import StateJournal
+from conversation_memory import ContextWindow, SegmentStore
+from memory_index import MemoryIndex
+from knowledge_graph import KnowledgeGraph
+from module_registry import ModuleRegistry
+from state_lock import ReadWriteLock
+from response_cache import ResponseCache
+from state_format import BinaryState, LazyState, write_state
+from state_shards import SECTIONS, ShardStore
+from goal_scheduler import GoalScheduler
+from latency import LatencyRecorder
+from plugin_runner import PluginRunner
+
+try:
+    from memory_similarity import SimilarityIndex
+except ImportError:  # numpy/scipy not installed: similarity recall is skipped
+    SimilarityIndex = None
+
+AUTONOMOUS_GOALS = [
+    "Refine knowledge graph",
+    "Analyze modules",
+    "Generate new rules",
+    "Learn from memory"
+]
+
+DEFAULT_RULES = {
+    "math": "If query contains 'math', respond with logical calculations.",
+    "analyze": "If query contains 'analyze', perform deep reasoning.",
+    "learn": "If query contains 'learn', store the data in memory."
+}
+# Built-in rules are never persisted: state["rules"] holds learned rules only
+DEFAULT_RULE_SET = RuleSet(DEFAULT_RULES)
+
+# State section each journal op mutates
+OP_SECTIONS = {"m": "memory", "s": "memory", "r": "rules", "k": "knowledge_graph", "c": "context"}
 
 class AdvancedAutonomousAI:
-    def __init__(self, name="EvolvingMobileAI"):
+    def __init__(self, name="EvolvingMobileAI", compact_every=1000,
+                 memory_limit=1000, segment_size=500, context_budget=8000,
+                 recall_min_match=1.0, cache_size=1024, cache_ttl=300.0,
+                 state_format=None, think_interval=6.0, metrics=False,
+                 plugin_workers=2, plugin_timeout=5.0, similarity_threshold=0.6,
+                 similarity_approximate_after=100_000, modules=None, plugins=None,
+                 shared_rules=None, warm_indexes=True):
         self.name = name
+        self.memory_limit = memory_limit      # interactions kept in RAM
+        self.segment_size = segment_size      # interactions spilled per segment
+        self.context_budget = context_budget  # characters of rolling context
+        self.recall_min_match = recall_min_match  # share of prompt terms a recalled memory must contain
+        self._rule_matcher = None
+        self._memory_index = None
+        self._index_lock = threading.Lock()
+        self.similarity_threshold = similarity_threshold  # minimum cosine for similarity recall
+        self.similarity_approximate_after = similarity_approximate_after
+        self._similarity_index = None
+        self.lock = ReadWriteLock()  # readers reason, a single writer mutates state
+        self.response_cache = ResponseCache(cache_size, cache_ttl)
+        self.metrics = LatencyRecorder(enabled=metrics)  # per-stage latency histograms
         self.state = {
             "memory": [],
-            "modules": {},
-            "rules": {
-                "math": "If query contains 'math', respond with logical calculations.",
-                "analyze": "If query contains 'analyze', perform deep reasoning.",
-                "learn": "If query contains 'learn', store the data in memory."
-            },
-            "knowledge_graph": {},
-            "context": ""
+            "memory_start": 0,
+            "rules": {},
+            "knowledge_graph": KnowledgeGraph(),
+            "context": ContextWindow(context_budget)
         }
         self.running = False
-        self.module_dir = "./ai_modules"
+        self.scheduler = GoalScheduler(self._pursue_goal, AUTONOMOUS_GOALS, interval=think_interval)
+        self.module_dir = "./ai_modules" if modules is None else modules.module_dir
+        self.compact_every = compact_every  # journal records before a snapshot
+        self.journal = StateJournal(f"{self.name}_state.journal")
+        self.memory_store = SegmentStore(f"{self.name}_memory")
+        self.graph_path = f"{self.name}_graph.bin"
+        self.binary_path = f"{self.name}_state.bin"
+        self.shards = ShardStore(f"{self.name}_state")
+        # "json" (per-section shards), "binary", or None to keep whichever format was loaded
+        self.state_format = state_format
+        self._dirty = set()  # sections changed since their shard was last written
 
-        if not os.path.exists(self.module_dir):
-            os.makedirs(self.module_dir)
+        # A host running many agents passes in a shared registry, plugin pool
+        # and read-only rule set; the agent only stops what it created
+        self.shared_rules = DEFAULT_RULE_SET if shared_rules is None else shared_rules
+        self._owns_modules = modules is None
+        self._owns_plugins = plugins is None
+        if modules is None:
+            if not os.path.exists(self.module_dir):
+                os.makedirs(self.module_dir)
+            modules = ModuleRegistry(self.module_dir)
+            modules.start()
+        self.modules = modules
+        self._module_updates = modules.subscribe()
+        if plugins is None:
+            plugins = PluginRunner(self.module_dir, max_workers=plugin_workers,
+                                   timeout=plugin_timeout)
+        self.plugins = plugins
 
         self._load_state()
+        if warm_indexes:
+            # Decode rules and build the recall indexes without holding up the caller
+            threading.Thread(target=self.warm_indexes, daemon=True,
+                             name=f"{self.name}-warmup").start()
 
     def _load_state(self):
-        """Load previous AI state"""
+        """Load previous AI state: base snapshot, newer shards, then the journal"""
+        if os.path.exists(self.binary_path):
+            base = self._load_binary_snapshot()
+        else:
+            base = self._load_json_snapshot()
+        self.state_format = self.state_format or ("binary" if base == "binary" else "json")
+        journal_seq = self.state.pop("journal_seq", 0)
+        # Journal seq each section's snapshot reflects
+        section_seq = dict.fromkeys(SECTIONS, journal_seq)
+        section_seq["knowledge_graph"] = max(self.state["knowledge_graph"].seq, journal_seq)
+
+        loaded = base is not None
+        for section in SECTIONS:
+            shard = self.shards.load(section)
+            if shard is None or shard[0] <= section_seq[section]:
+                continue  # older than the base snapshot
+            section_seq[section], value = shard
+            if section == "memory":
+                self.state["memory"] = value["memory"]
+                self.state["memory_start"] = value["memory_start"]
+            elif section == "context":
+                self.state["context"] = ContextWindow(self.context_budget, value)
+            else:
+                self.state[section] = value
+            loaded = True
+        if base is not None and base != self.state_format:
+            self._dirty.update(SECTIONS)  # rewrite everything in the new format
+
+        replayed = 0
+        for seq, op, args in self.journal.replay(after=min(section_seq.values())):
+            if seq <= section_seq[OP_SECTIONS[op]]:
+                continue  # already in that section's snapshot
+            self._apply_record(op, args)
+            replayed += 1
+        self.journal.seq = max(self.journal.seq, *section_seq.values())
+
+        # Drop ring entries whose spill was written but not yet journaled
+        unjournaled = len(self.memory_store) - self.state["memory_start"]
+        if unjournaled > 0:
+            self._record("s", unjournaled)
+        if not isinstance(self.state, LazyState) or self.state.is_loaded("memory"):
+            self._spill_memory()
+
+        if loaded or replayed:
+            print(f"[{self.name}] Previous state loaded ({replayed} journal records replayed).")
+        else:
+            print(f"[{self.name}] Starting fresh...")
+
+    def _load_json_snapshot(self):
+        """Read a single-file {name}_state.json and {name}_graph.bin from older versions.
+
+        Returns "legacy" if either existed, else None.
+        """
+        loaded = False
         try:
             with open(f"{self.name}_state.json", "r") as f:
                 self.state = json.load(f)
-            print(f"[{self.name}] Previous state loaded.")
+            self.state.pop("modules", None)  # live modules live in self.modules
+            self.state.setdefault("memory_start", 0)
+            self.state["context"] = ContextWindow(self.context_budget, self.state["context"])
+            loaded = True
         except FileNotFoundError:
-            print(f"[{self.name}] Starting fresh...")
+            pass
+
+        graph = KnowledgeGraph()
+        if os.path.exists(self.graph_path):
+            graph = KnowledgeGraph.load(self.graph_path)
+            loaded = True
+        legacy = self.state.get("knowledge_graph")
+        if isinstance(legacy, dict):
+            # States saved before the graph store mapped prompt -> response
+            for prompt, response in legacy.items():
+                graph.add_edge(prompt, response, "response")
+        self.state["knowledge_graph"] = graph
+        return "legacy" if loaded else None
+
+    def _load_binary_snapshot(self):
+        """Map {name}_state.bin; sections other than the graph decode on first access"""
+        snapshot = BinaryState(self.binary_path)
+        self.state = LazyState(
+            {
+                "memory": snapshot.memory,
+                "rules": snapshot.rules,
+                "context": lambda: ContextWindow(self.context_budget, snapshot.context()),
+            },
+            knowledge_graph=snapshot.graph(),
+            **snapshot.meta(),
+        )
+        return "binary"
+
+    def _apply_record(self, op, args):
+        """Apply one journal record to the in-memory state"""
+        self._dirty.add(OP_SECTIONS[op])
+        if op == "m":
+            self.state["memory"].append(args[0])
+        elif op == "r":
+            self.state["rules"][args[0]] = args[1]
+        elif op == "k":
+            self.state["knowledge_graph"].add_edge(args[0], args[1], "response")
+        elif op == "c":
+            self.state["context"].append(args[0])
+        elif op == "s":
+            del self.state["memory"][:args[0]]
+            self.state["memory_start"] += args[0]
+
+    def _record(self, op, *args):
+        """Apply a mutation and append it to the journal"""
+        self._apply_record(op, args)
+        self.journal.append(op, *args)
+
+    def _remember(self, entry):
+        """Append an interaction to memory, spilling old ones past the limit"""
+        self._record("m", entry)
+        doc_id = self.state["memory_start"] + len(self.state["memory"]) - 1
+        if self._memory_index is not None:
+            self._memory_index.add(doc_id, self._memory_text(entry))
+        if self._similarity_index is not None and "prompt" in entry:
+            self._similarity_index.add(doc_id, entry["prompt"])
+        if len(self.state["memory"]) > self.memory_limit:
+            self._spill_memory()
+
+    def _spill_memory(self):
+        """Move the oldest in-memory interactions to the on-disk segment store"""
+        memory = self.state["memory"]
+        while len(memory) > self.memory_limit:
+            count = min(self.segment_size, len(memory))
+            self.memory_store.write(self.state["memory_start"], memory[:count])
+            self._record("s", count)
+
+    @staticmethod
+    def _memory_text(entry):
+        """Text of an interaction that memory recall searches over"""
+        return " ".join(str(entry[key]) for key in ("prompt", "auto_goal", "learning") if key in entry)
+
+    @property
+    def rule_matcher(self):
+        """Keyword automaton over the learned rules, built on first use"""
+        if self._rule_matcher is None:
+            with self._index_lock:
+                if self._rule_matcher is None:
+                    self._rule_matcher = RuleMatcher(self.state["rules"])
+        return self._rule_matcher
+
+    @property
+    def memory_index(self):
+        """Inverted index over all memory, built on first recall"""
+        if self._memory_index is None:
+            with self._index_lock:
+                if self._memory_index is None:
+                    index = MemoryIndex()
+                    for doc_id, entry in enumerate(self.iter_memory()):
+                        index.add(doc_id, self._memory_text(entry))
+                    self._memory_index = index
+        return self._memory_index
+
+    @property
+    def similarity_index(self):
+        """Hashed TF-IDF index over stored prompts, or None without numpy/scipy"""
+        if self._similarity_index is None and SimilarityIndex is not None:
+            with self._index_lock:
+                if self._similarity_index is None:
+                    index = SimilarityIndex(approximate_after=self.similarity_approximate_after)
+                    for doc_id, entry in enumerate(self.iter_memory()):
+                        if "prompt" in entry:
+                            index.add(doc_id, entry["prompt"])
+                    self._similarity_index = index
+        return self._similarity_index
+
+    def warm_indexes(self):
+        """Build the rule matcher and recall indexes now instead of on first use"""
+        with self.lock.read():
+            self.rule_matcher
+            self.memory_index
+            self.similarity_index
+
+    def _memory_entry(self, doc_id):
+        """Look up an interaction by its global memory index"""
+        offset = doc_id - self.state["memory_start"]
+        if offset >= 0:
+            return self.state["memory"][offset]
+        return self.memory_store.get(doc_id)
+
+    def iter_memory(self):
+        """Iterate over every stored interaction, spilled ones first"""
+        yield from self.memory_store
+        yield from self.state["memory"]
+
+    def _snapshot_state(self):
+        """JSON-serializable copy of the state (the graph is saved separately)"""
+        snapshot = dict(self.state, context=str(self.state["context"]),
+                        journal_seq=self.journal.seq)
+        del snapshot["knowledge_graph"]
+        return snapshot
+
+    def compact_state(self):
+        """Fold the journal into the snapshot and truncate it.
+
+        In the JSON format only sections changed since they were last written
+        get a new shard; the binary format is always rewritten whole.
+        """
+        self.journal.flush()
+        seq = self.journal.seq
+        stale = [f"{self.name}_state.json", self.graph_path]
+        if self.state_format == "binary":
+            if isinstance(self.state, LazyState):
+                self.state.resolve()
+            write_state(self.binary_path, self._snapshot_state(), self.state["knowledge_graph"])
+            self.state["knowledge_graph"] = BinaryState(self.binary_path).graph()
+            self.shards.clear()
+        else:
+            for section in SECTIONS:
+                if section in self._dirty:
+                    self._write_shard(section, seq)
+            stale.append(self.binary_path)
+        for path in stale:
+            if os.path.exists(path):
+                os.remove(path)
+        self._dirty.clear()
+        self.journal.reset()
+
+    def _write_shard(self, section, seq):
+        if section == "memory":
+            value = {"memory_start": self.state["memory_start"], "memory": self.state["memory"]}
+        elif section == "context":
+            value = str(self.state["context"])
+        else:
+            value = self.state[section]
+        self.shards.write(section, value, seq)
+        if section == "knowledge_graph":
+            self.state["knowledge_graph"] = KnowledgeGraph.load(self.shards.path(section))
 
     def save_state(self):
-        """Save AI state"""
-        with open(f"{self.name}_state.json", "w") as f:
-            json.dump(self.state, f, indent=4)
+        """Save AI state: make the journal durable, compacting it when it grows"""
+        with self.lock.write():
+            self._persist()
         print(f"[{self.name}] State saved!")
 
+    def _persist(self):
+        if len(self.journal) >= self.compact_every:
+            self.compact_state()
+        else:
+            self.journal.flush()
+
     def _reason(self, prompt: str) -> str:
         """Reasoning engine with rules, memory, and knowledge graph"""
-        # Check rules
-        for keyword, rule in self.state["rules"].items():
-            if keyword in prompt.lower():
-                return f"[Rule Applied] {rule}"
+        with self.metrics.stage("reason"):
+            key = ResponseCache.normalize(prompt)
+            with self.metrics.stage("cache"):
+                response = self.response_cache.get(key)
+            if response is None:
+                response, source = self._reason_uncached(prompt)
+                # Memory recall and default answers change on every interaction
+                if source in ("rule", "knowledge_graph"):
+                    self.response_cache.put(key, response, source)
+            return response
+
+    def _reason_uncached(self, prompt: str):
+        """Return (response, source) where source names the stage that answered"""
+        # Check rules, shared defaults first
+        with self.metrics.stage("rules"):
+            lowered = prompt.lower()
+            shared = self.shared_rules.match(lowered)
+            keyword = self.rule_matcher.first_match(lowered) if shared is None else None
+        if shared is not None:
+            return f"[Rule Applied] {shared[1]}", "rule"
+        if keyword is not None:
+            return f"[Rule Applied] {self.state['rules'][keyword]}", "rule"
 
         # Check knowledge graph
-        if prompt in self.state["knowledge_graph"]:
-            linked = self.state["knowledge_graph"][prompt]
-            return f"Based on previous knowledge: {linked}"
+        with self.metrics.stage("knowledge_graph"):
+            linked = self.state["knowledge_graph"].latest(prompt, "response")
+        if linked is not None:
+            return f"Based on previous knowledge: {linked}", "knowledge_graph"
 
         # Memory recall
-        for mem in reversed(self.state["memory"][-10:]):
-            if prompt.lower() in str(mem).lower():
-                return f"I remember: {mem.get('response', 'No data')}"
+        with self.metrics.stage("memory_recall"):
+            hits = self.memory_index.search(prompt, 1, self.recall_min_match)
+        if hits:
+            mem = self._memory_entry(hits[0][1])
+            return f"I remember: {mem.get('response', 'No data')}", "memory"
+
+        # Similar past prompts
+        if self.similarity_index is not None:
+            with self.metrics.stage("similarity"):
+                near = self.similarity_index.search(prompt, 1)
+            if near and near[0][0] >= self.similarity_threshold:
+                mem = self._memory_entry(near[0][1])
+                return f"I remember something similar: {mem.get('response', 'No data')}", "similarity"
 
         # Default autonomous reasoning
         return random.choice([
             "Analyzing problem...",
             "Generating new reasoning...",
             "Exploring knowledge graph for connections..."
-        ])
+        ]), "default"
 
     def _evolve_rules(self, prompt: str, response: str):
         """AI evolves by creating new rules dynamically"""
         if "if" in prompt.lower() and "then" in prompt.lower():
             new_rule = prompt.strip()
             rule_name = f"rule_{len(self.state['rules'])+1}"
-            self.state["rules"][rule_name] = new_rule
+            self._record("r", rule_name, new_rule)
+            if self._rule_matcher is not None:  # otherwise it is built with the rule
+                self._rule_matcher.add(rule_name)
+            self.response_cache.invalidate_keyword(rule_name)
             print(f"[{self.name}] Learned new rule: {new_rule}")
 
     def _update_knowledge_graph(self, prompt: str, response: str):
-        """AI builds a knowledge graph"""
-        self.state["knowledge_graph"][prompt] = response
+        """AI builds a knowledge graph: prompt -[response]-> response"""
+        if self.state["knowledge_graph"].latest(prompt, "response") != response:
+            self._record("k", prompt, response)
+            self.response_cache.invalidate(ResponseCache.normalize(prompt))
+
+    def respond(self, user_prompt: str) -> str:
+        """Reason about a prompt without changing state (safe to run concurrently)"""
+        self.scheduler.note_interactive()
+        with self.lock.read():
+            return self._reason(user_prompt)
+
+    def commit(self, user_prompt: str, response: str):
+        """Apply the state updates for one answered prompt"""
+        with self.metrics.stage("commit"), self.lock.write():
+            self._apply_interaction(user_prompt, response)
+            self._auto_integrate_modules(user_prompt)
+
+    def _apply_interaction(self, user_prompt: str, response: str):
+        self._remember({"prompt": user_prompt, "response": response})
+        self._record("c", f"\nUser: {user_prompt}\nAI: {response}")
+        self._evolve_rules(user_prompt, response)
+        self._update_knowledge_graph(user_prompt, response)
+
+    def think_many(self, prompts, batch_size=1000, stream=False):
+        """Answer an iterable of prompts, committing state once per batch.
+
+        Prompts are consumed batch_size at a time. Each batch is reasoned and
+        applied under a single write lock, exactly as consecutive think()
+        calls would, and the journal is made durable once at the end. Returns
+        a list of (prompt, response) pairs, or a generator of them when
+        stream is True so arbitrarily large replays run in constant memory.
+        """
+        results = self._think_batches(prompts, batch_size)
+        return results if stream else list(results)
+
+    def _think_batches(self, prompts, batch_size):
+        batch = []
+        for prompt in prompts:
+            batch.append(prompt)
+            if len(batch) >= batch_size:
+                yield from self._think_batch(batch)
+                batch = []
+        if batch:
+            yield from self._think_batch(batch)
+
+    def _think_batch(self, prompts):
+        results = []
+        with self.lock.write():
+            for prompt in prompts:
+                response = self._reason(prompt)
+                self._apply_interaction(prompt, response)
+                results.append((prompt, response))
+            self._auto_integrate_modules(prompts[-1])
+            self._persist()
+        return results
 
     def think(self, user_prompt: str = None):
         """Main reasoning loop"""
         if user_prompt:
-            print(f"[User] {user_prompt}")
-            response = self._reason(user_prompt)
-            print(f"[{self.name}] {response}")
-
-            self.state["memory"].append({"prompt": user_prompt, "response": response})
-            self.state["context"] += f"\nUser: {user_prompt}\nAI: {response}"
-            self._evolve_rules(user_prompt, response)
-            self._update_knowledge_graph(user_prompt, response)
-            self._auto_integrate_modules(user_prompt)
+            with self.metrics.stage("think"):
+                with self.metrics.stage("print"):
+                    print(f"[User] {user_prompt}")
+                response = self.respond(user_prompt)
+                with self.metrics.stage("print"):
+                    print(f"[{self.name}] {response}")
+                self.commit(user_prompt, response)
         else:
             # Autonomous thinking (self-generated goals)
-            auto_goal = random.choice([
-                "Refine knowledge graph",
-                "Analyze modules",
-                "Generate new rules",
-                "Learn from memory"
-            ])
+            self._pursue_goal(random.choice(AUTONOMOUS_GOALS))
+
+    def _pursue_goal(self, auto_goal: str) -> str:
+        """Reason about a self-generated goal and remember the outcome"""
+        with self.lock.read():
             response = self._reason(auto_goal)
-            print(f"[{self.name}] Autonomous Thinking: {response}")
-            self.state["memory"].append({"auto_goal": auto_goal, "response": response})
+        print(f"[{self.name}] Autonomous Thinking: {response}")
+        with self.lock.write():
+            self._remember({"auto_goal": auto_goal, "response": response})
             self._auto_integrate_modules(auto_goal)
+        return response
 
     def _auto_integrate_modules(self, context: str):
-        """Integrate external AI modules dynamically"""
-        for file in os.listdir(self.module_dir):
-            if file.endswith(".py"):
-                module_name = file[:-3]
-                if module_name not in self.state["modules"]:
-                    try:
-                        module = importlib.import_module(f"ai_modules.{module_name}")
-                        self.state["modules"][module_name] = module
-                        print(f"[{self.name}] Integrated module: {module_name}")
+        """Integrate modules the registry loaded or reloaded since the last call.
 
-                        if hasattr(module, "run"):
-                            module.run(context)
-                    except Exception as e:
-                        print(f"[Error] Failed to load {module_name}: {e}")
+        Module run hooks execute in the plugin worker pool; their results are
+        collected with self.plugins.results() or through the returned futures.
+        """
+        with self.metrics.stage("modules"):
+            for module_name, module in self._module_updates.drain():
+                mtime = self.modules.mtime(module_name)
+                if not self.plugins.observe(module_name, mtime):
+                    continue  # another agent sharing the runner integrated this version
+                print(f"[{self.name}] Integrated module: {module_name}")
+                if hasattr(module, "run"):
+                    try:
+                        self.plugins.submit(module_name, context, mtime)
+                    except queue.Full as e:
+                        print(f"[Error] Module {module_name} not run: {e}")
 
     def learn(self, data):
         """Store knowledge"""
-        self.state["memory"].append({"learning": data})
+        with self.lock.write():
+            self._remember({"learning": data})
         print(f"[{self.name}] Learned: {data}")
 
     def run_background(self):
         """Run AI autonomously in the background"""
-        def background_task():
-            self.running = True
-            while self.running:
-                self.think()
-                time.sleep(6)  # Faster thinking loop for autonomous reasoning
-
-        thread = threading.Thread(target=background_task, daemon=True)
-        thread.start()
+        self.running = True
+        self.scheduler.start()
         print(f"[{self.name}] Running in autonomous background mode...")
 
     def stop(self):
         self.running = False
+        self.scheduler.stop()
+        if self._owns_modules:
+            self.modules.stop()
+        if self._owns_plugins:
+            self.plugins.shutdown()
         self.save_state()
+        self.journal.close()
         print(f"[{self.name}] Stopped running.")
 
 
@@ -150,8 +544,9 @@ if __name__ == "__main__":
         while True:
             user_prompt = input(">> Your prompt (or type 'exit'): ")
             if user_prompt.lower() == "exit":
-                ai.stop()
                 break
             ai.think(user_prompt)
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
         ai.stop()
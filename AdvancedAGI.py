@@ -1,43 +1,62 @@
 # main.py
 
-import os
-import wikipediaapi
-from transformers import pipeline
-from threading import Thread
+from job_queue import JobQueue, report_progress
+from processor_registry import ProcessorChain
+from wiki_cache import WikiPageCache
+from micro_batcher import MicroBatcher
+from lazy_loader import LazyObject
 import time
-import numpy as np
-from data_processors import process_data, tokenize_data, normalize_data, vectorize_data, cluster_data
+
+def _wikipedia_client():
+    import wikipediaapi
+    return wikipediaapi.Wikipedia('en')
+
+def _question_answering():
+    from transformers import pipeline
+    return pipeline("question-answering")
 
 class AdvancedAGI:
-    def __init__(self):
+    def __init__(self, wikipedia_client=None):
         self.data_processors = ["data_processors.py"]
-        self.wikipedia = wikipediaapi.Wikipedia('en')
-        self.nlp_processor = pipeline("question-answering")
+        self.processor_chain = ProcessorChain(self.data_processors)
+        # Clients and models load on first use (or in warmup())
+        self.wikipedia = wikipedia_client or LazyObject(_wikipedia_client)
+        self.wiki_cache = WikiPageCache(self.wikipedia)
+        self.nlp_processor = LazyObject(_question_answering)
+        # Concurrent analyze_text calls share batched forward passes
+        self.qa_batcher = MicroBatcher(self._answer_batch, max_batch_size=16, max_wait=0.01)
+        # Bounded pool for background_processing jobs
+        self.jobs = JobQueue(workers=4, max_pending=64, name="background")
 
     def process_data_with_processors(self, data):
-        processed_data = data
-        for processor_file in self.data_processors:
-            processor_path = os.path.join(os.getcwd(), processor_file)
-            if os.path.exists(processor_path):
-                try:
-                    # Load processor module dynamically
-                    processor_module = __import__(processor_file.replace('.py', ''))
-                    for processor_name in dir(processor_module):
-                        if callable(getattr(processor_module, processor_name)):
-                            # Call each processor function dynamically
-                            processed_data = getattr(processor_module, processor_name)(processed_data)
-                except Exception as e:
-                    print(f"Error processing data with {processor_file}: {e}")
-        return processed_data
+        # Run data through the compiled processor chain
+        return self.processor_chain(data)
+
+    def enrich_data(self, data):
+        # Every named value the processors produce; declared ones run as a DAG
+        return self.processor_chain.run(data)
 
-    def analyze_text(self, text):
+    def _answer_batch(self, inputs):
+        # One forward pass over a batch of question-answering inputs
+        results = self.nlp_processor(inputs, batch_size=len(inputs))
+        return results if isinstance(results, list) else [results]
+
+    def analyze_text(self, text, context=None):
         # Perform text analysis using NLP pipeline
         try:
-            result = self.nlp_processor(question=text)
+            inputs = {"question": text} if context is None else {"question": text, "context": context}
+            result = self.qa_batcher.submit(inputs).result()
             return result
         except Exception as e:
             print(f"Error analyzing text: {e}")
 
+    def warmup(self):
+        # Load the models and clients now instead of on the first request
+        for resource in (self.nlp_processor, self.wikipedia):
+            if isinstance(resource, LazyObject):
+                resource.load()
+        return self
+
     def connect_to_internet(self):
         # Connect to the internet (placeholder)
         print("Connected to the internet.")
@@ -45,9 +64,9 @@ class AdvancedAGI:
     def gather_information(self, topic):
         # Gather information from Wikipedia
         try:
-            page = self.wikipedia.page(topic)
-            if page.exists():
-                return page.text
+            text = self.wiki_cache.get(topic)
+            if text is not None:
+                return text
             else:
                 print(f"Wikipedia page for '{topic}' not found.")
                 return ''
@@ -58,15 +77,23 @@ class AdvancedAGI:
     def background_processing(self, data):
         # Background processing function
         print("Background processing started.")
+        report_progress(0.0, "started")
         time.sleep(3)  # Simulate processing time
+        report_progress(0.5, "processing")
         processed_data = self.process_data_with_processors(data)
         print("Background processing completed.")
         return processed_data
 
+    def submit_background(self, data, block=True, timeout=None):
+        # Queue background_processing; blocks while the job queue is full
+        return self.jobs.submit(self.background_processing, data, block=block, timeout=timeout)
+
 if __name__ == "__main__":
     agi = AdvancedAGI()
     agi.connect_to_internet()
-    agi_thread = Thread(target=agi.background_processing, args=("Sample data to process",))
-    agi_thread.start()
+    job = agi.submit_background("Sample data to process")
     agi.analyze_text("What is artificial intelligence?")
     agi.gather_information("Artificial intelligence")
+    print("Processed Data:", job.result())
+    print("Job stats:", agi.jobs.stats())
+    agi.jobs.shutdown()
@@ -0,0 +1,120 @@
+# agent_benchmark.py
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WORDS = [f"w{i}" for i in range(5000)]
+
+
+def _sentence(rng, n=8):
+    return " ".join(rng.choices(WORDS, k=n))
+
+
+def _build(agent, size, rng):
+    """Fill an agent with `size` rules, memories and knowledge-graph edges"""
+    with agent.lock.write():
+        for i in range(size):
+            name = f"kw{i}"
+            agent._record("r", name, f"if {name} then {_sentence(rng, 4)}")
+            agent.rule_matcher.add(name)
+            agent._remember({"prompt": _sentence(rng), "response": _sentence(rng, 4)})
+            agent._record("k", f"topic {i}", _sentence(rng, 4))
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def run_single(size, prompts, state_format, seed):
+    """Benchmark one agent size in the current process and return the results"""
+    sys.path.insert(0, HERE)
+    from AGI import AdvancedAutonomousAI
+
+    rng = random.Random(seed)
+    results = {"size": size, "state_format": state_format}
+    with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(workdir)
+        agent = AdvancedAutonomousAI("Bench", state_format=state_format, metrics=True)
+        results["build_seconds"] = _timed(lambda: _build(agent, size, rng))
+        results["compact_seconds"] = _timed(agent.compact_state)
+
+        queries = [_sentence(rng, 3) for _ in range(prompts)]
+        agent.metrics.reset()
+        results["think_total_seconds"] = _timed(lambda: [agent.think(q) for q in queries])
+        results["stages"] = agent.metrics.snapshot()
+
+        results["save_seconds"] = _timed(agent.save_state)
+        agent.stop()
+
+        started = time.perf_counter()
+        reloaded = AdvancedAutonomousAI("Bench")
+        results["load_seconds"] = time.perf_counter() - started
+        # A prompt the response cache has never seen, so the first think reasons in full
+        unseen = _sentence(rng, 3)
+        results["first_think_seconds"] = _timed(lambda: reloaded.think(unseen))
+        reloaded.stop()
+        os.chdir(HERE)
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    results["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for AdvancedAutonomousAI")
+    parser.add_argument("--min-exp", type=int, default=2, help="smallest size as a power of ten")
+    parser.add_argument("--max-exp", type=int, default=6, help="largest size as a power of ten")
+    parser.add_argument("--prompts", type=int, default=200, help="think() calls per size")
+    parser.add_argument("--format", choices=("json", "binary"), default="json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        print(json.dumps(run_single(args.single, args.prompts, args.format, args.seed)))
+        return
+
+    runs = []
+    for exp in range(args.min_exp, args.max_exp + 1):
+        size = 10 ** exp
+        # A fresh process per size keeps peak memory figures independent
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--single", str(size),
+             "--prompts", str(args.prompts), "--format", args.format, "--seed", str(args.seed)],
+            capture_output=True, text=True, check=True)
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        think = result["stages"].get("think", {})
+        print(f"size={size:>8}  think p50={think.get('p50', 0) * 1e3:.3f}ms "
+              f"p99={think.get('p99', 0) * 1e3:.3f}ms  save={result['save_seconds'] * 1e3:.1f}ms  "
+              f"load={result['load_seconds'] * 1e3:.1f}ms  "
+              f"rss={result['peak_rss_bytes'] / 2 ** 20:.0f}MiB")
+        runs.append(result)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": runs,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# agent_host.py
+
+import os
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from AGI import DEFAULT_RULES, AdvancedAutonomousAI
+from module_registry import ModuleRegistry
+from plugin_runner import PluginRunner
+from rule_matcher import RuleSet
+
+
+class AgentHost:
+    """Run many named AdvancedAutonomousAI agents in one process.
+
+    Agents share one ModuleRegistry (each drains its own subscription), one
+    PluginRunner worker pool and one read-only RuleSet of default rules, while
+    learned rules, memory, knowledge graph and context stay per agent. An
+    agent's state is loaded the first time it is asked for. With max_active
+    set, the least recently used agents are saved and unloaded to bound
+    memory. Agents held through lease() (as think() and the other helpers
+    do) are never unloaded, and an agent is not reloaded until its previous
+    instance has finished saving, so one journal never has two writers.
+    """
+
+    def __init__(self, module_dir="./ai_modules", max_active=None, plugin_workers=2,
+                 plugin_timeout=5.0, rules=DEFAULT_RULES, **agent_options):
+        os.makedirs(module_dir, exist_ok=True)
+        self.modules = ModuleRegistry(module_dir)
+        self.modules.start()
+        self.plugins = PluginRunner(module_dir, max_workers=plugin_workers, timeout=plugin_timeout)
+        self.default_rules = RuleSet(rules)
+        self.max_active = max_active
+        self.agent_options = agent_options  # passed to every AdvancedAutonomousAI
+        self._agents = OrderedDict()        # name -> agent, least recently used first
+        self._loading = {}                  # name -> lock held while that agent loads
+        self._closing = {}                  # name -> event set once its old instance stopped
+        self._leases = Counter()            # name -> callers currently using the agent
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._agents
+
+    def __len__(self):
+        with self._lock:
+            return len(self._agents)
+
+    def names(self):
+        """Names of the agents currently loaded"""
+        with self._lock:
+            return list(self._agents)
+
+    def agent(self, name):
+        """Return the named agent, loading its state on first use.
+
+        The agent may be unloaded again once it is not leased; use lease()
+        to keep it loaded while you hold it.
+        """
+        with self.lease(name) as agent:
+            return agent
+
+    @contextmanager
+    def lease(self, name):
+        """Hold the named agent loaded for the duration of a with block"""
+        agent = self._acquire(name)
+        try:
+            yield agent
+        finally:
+            self._release(name)
+
+    def _acquire(self, name):
+        while True:
+            with self._lock:
+                agent = self._agents.get(name)
+                if agent is not None:
+                    self._agents.move_to_end(name)
+                    self._leases[name] += 1
+                    return agent
+                closing = self._closing.get(name)
+                loading = self._loading.setdefault(name, threading.Lock())
+            if closing is not None:
+                closing.wait()  # the previous instance is still saving
+                continue
+            # Loads of different agents run in parallel; the same agent loads once
+            with loading:
+                with self._lock:
+                    retry = name in self._agents or name in self._closing
+                if not retry:
+                    agent = AdvancedAutonomousAI(name, modules=self.modules, plugins=self.plugins,
+                                                 shared_rules=self.default_rules, **self.agent_options)
+                    with self._lock:
+                        self._agents[name] = agent
+                        self._leases[name] += 1
+                        self._loading.pop(name, None)
+                        evicted = self._select_evictions()
+            if retry:
+                continue
+            self._close(evicted)
+            return agent
+
+    def _release(self, name):
+        with self._lock:
+            self._leases[name] -= 1
+            if not self._leases[name]:
+                del self._leases[name]
+            evicted = self._select_evictions()
+        self._close(evicted)
+
+    def _select_evictions(self):
+        """Unregister least recently used idle agents over max_active; call with the lock held"""
+        evicted = []
+        if self.max_active is None:
+            return evicted
+        for name in list(self._agents):
+            if len(self._agents) <= self.max_active:
+                break
+            if self._leases[name]:
+                continue
+            evicted.append((name, self._agents.pop(name)))
+            self._closing[name] = threading.Event()
+        return evicted
+
+    def _close(self, evicted):
+        for name, agent in evicted:
+            try:
+                agent.stop()
+            finally:
+                with self._lock:
+                    self._closing.pop(name).set()
+
+    def think(self, name, prompt):
+        with self.lease(name) as agent:
+            agent.think(prompt)
+
+    def respond(self, name, prompt):
+        with self.lease(name) as agent:
+            return agent.respond(prompt)
+
+    def commit(self, name, prompt, response):
+        with self.lease(name) as agent:
+            agent.commit(prompt, response)
+
+    def learn(self, name, data):
+        with self.lease(name) as agent:
+            agent.learn(data)
+
+    def unload(self, name):
+        """Save and drop a loaded agent that is not leased; returns whether it was"""
+        with self._lock:
+            if name not in self._agents or self._leases[name]:
+                return False
+            evicted = [(name, self._agents.pop(name))]
+            self._closing[name] = threading.Event()
+        self._close(evicted)
+        return True
+
+    def stop(self):
+        with self._lock:
+            evicted = list(self._agents.items())
+            self._agents = OrderedDict()
+            for name, _ in evicted:
+                self._closing[name] = threading.Event()
+        self._close(evicted)
+        self.modules.stop()
+        self.plugins.shutdown()
+
+
+if __name__ == "__main__":
+    host = AgentHost()
+
+    try:
+        while True:
+            line = input(">> agent: prompt (or type 'exit'): ")
+            if line.lower() == "exit":
+                break
+            name, sep, prompt = line.partition(":")
+            if not sep:
+                print("Format: <agent name>: <prompt>")
+                continue
+            host.think(name.strip(), prompt.strip())
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        host.stop()
@@ -0,0 +1,135 @@
+# agent_server.py
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from AGI import AdvancedAutonomousAI
+
+
+class AgentServer:
+    """Serve AdvancedAutonomousAI prompts to many clients over a local socket.
+
+    The protocol is newline-delimited JSON: each request line is
+    ``{"prompt": "..."}`` (or a bare line of text) and each reply line is
+    ``{"response": "..."}``; a malformed line, or one over `max_line` bytes,
+    gets an ``{"error": "..."}`` reply and the connection stays open.
+    Reasoning runs on a worker pool under the agent's read lock; every state
+    mutation is handed to a single writer thread, so commits are applied one
+    at a time and in arrival order.
+    """
+
+    def __init__(self, agent, host="127.0.0.1", port=8765, workers=None, max_line=2 ** 20):
+        self.agent = agent
+        self.host = host
+        self.port = port
+        self.max_line = max_line    # longest request line in bytes
+        self.workers = ThreadPoolExecutor(workers or os.cpu_count(), thread_name_prefix="reason")
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="commit")
+        self._server = None
+
+    async def _handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                prompt, error = request
+                reply = {"error": error} if error else await self._respond(loop, prompt)
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """Next (prompt, error) from the client, or None once it disconnects"""
+        while True:
+            try:
+                raw = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                if not e.partial:
+                    return None
+                raw = e.partial  # last line without a newline
+            except asyncio.LimitOverrunError:
+                await self._skip_line(reader)
+                return None, f"Bad request: line longer than {self.max_line} bytes"
+            try:
+                line = raw.decode("utf-8").strip()
+                if not line:
+                    continue
+                prompt = json.loads(line)["prompt"] if line.startswith("{") else line
+                if not isinstance(prompt, str):
+                    raise ValueError("prompt must be a string")
+            except (ValueError, KeyError) as e:
+                return None, f"Bad request: {e}"
+            return prompt, None
+
+    @staticmethod
+    async def _skip_line(reader):
+        """Discard the rest of an over-long line, keeping any request after it"""
+        try:
+            while True:
+                try:
+                    await reader.readuntil(b"\n")
+                    return
+                except asyncio.LimitOverrunError as e:
+                    await reader.readexactly(e.consumed)
+        except asyncio.IncompleteReadError:
+            pass
+
+    async def _respond(self, loop, prompt):
+        try:
+            response = await loop.run_in_executor(self.workers, self.agent.respond, prompt)
+        except Exception as e:
+            print(f"[Error] Responding to {prompt!r} failed: {e}")
+            return {"error": f"Agent error: {e}"}
+        # Replies don't wait for the commit; the writer keeps them ordered
+        commit = loop.run_in_executor(self.writer, self.agent.commit, prompt, response)
+        commit.add_done_callback(self._committed)
+        return {"response": response}
+
+    @staticmethod
+    def _committed(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"[Error] Commit failed: {future.exception()!r}")
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                  limit=self.max_line)
+        print(f"[{self.agent.name}] Serving on {self.host}:{self.port}")
+        return self._server
+
+    async def serve_forever(self):
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self.workers.shutdown(wait=True)
+        self.writer.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve an AdvancedAutonomousAI agent")
+    parser.add_argument("--name", default="EvolvingMobileAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    ai = AdvancedAutonomousAI(args.name)
+    server = AgentServer(ai, args.host, args.port, args.workers)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        ai.stop()
@@ -1,34 +1,56 @@
-import os
-import wikipediaapi
-from transformers import pipeline
-import numpy as np
+from processor_registry import ProcessorChain
+from wiki_cache import WikiPageCache
+from micro_batcher import MicroBatcher
+from lazy_loader import LazyObject
+
+def _wikipedia_client():
+    import wikipediaapi
+    return wikipediaapi.Wikipedia('en')
+
+def _question_answering():
+    from transformers import pipeline
+    return pipeline("question-answering")
 
 class AdvancedAGI:
-    def __init__(self):
+    def __init__(self, wikipedia_client=None):
         self.data_processors = ["processors.py", "quantum_processor.py", "file_processing.py"]
-        self.wikipedia = wikipediaapi.Wikipedia('en')
-        self.nlp_processor = pipeline("question-answering")
+        self.processor_chain = ProcessorChain(self.data_processors)
+        # Clients and models load on first use (or in warmup())
+        self.wikipedia = wikipedia_client or LazyObject(_wikipedia_client)
+        self.wiki_cache = WikiPageCache(self.wikipedia)
+        self.nlp_processor = LazyObject(_question_answering)
+        # Concurrent analyze_text calls share batched forward passes
+        self.qa_batcher = MicroBatcher(self._answer_batch, max_batch_size=16, max_wait=0.01)
 
     def process_data_with_processors(self, data):
-        processed_data = data
-        for processor_file in self.data_processors:
-            processor_path = os.path.join(os.getcwd(), processor_file)
-            if os.path.exists(processor_path):
-                try:
-                    # Assuming each processor has a method called process_data
-                    processed_data = getattr(__import__(processor_file.replace('.py', '')), 'process_data')(processed_data)
-                except Exception as e:
-                    print(f"Error processing data with {processor_file}: {e}")
-        return processed_data
+        # Run data through the compiled processor chain
+        return self.processor_chain(data)
+
+    def enrich_data(self, data):
+        # Every named value the processors produce; declared ones run as a DAG
+        return self.processor_chain.run(data)
 
-    def analyze_text(self, text):
+    def _answer_batch(self, inputs):
+        # One forward pass over a batch of question-answering inputs
+        results = self.nlp_processor(inputs, batch_size=len(inputs))
+        return results if isinstance(results, list) else [results]
+
+    def analyze_text(self, text, context=None):
         # Perform text analysis using NLP pipeline
         try:
-            result = self.nlp_processor(question=text)
+            inputs = {"question": text} if context is None else {"question": text, "context": context}
+            result = self.qa_batcher.submit(inputs).result()
             return result
         except Exception as e:
             print(f"Error analyzing text: {e}")
 
+    def warmup(self):
+        # Load the models and clients now instead of on the first request
+        for resource in (self.nlp_processor, self.wikipedia):
+            if isinstance(resource, LazyObject):
+                resource.load()
+        return self
+
     def connect_to_internet(self):
         # Connect to the internet (placeholder)
         print("Connected to the internet.")
@@ -36,9 +58,9 @@ class AdvancedAGI:
     def gather_information(self, topic):
         # Gather information from Wikipedia
         try:
-            page = self.wikipedia.page(topic)
-            if page.exists():
-                return page.text
+            text = self.wiki_cache.get(topic)
+            if text is not None:
+                return text
             else:
                 print(f"Wikipedia page for '{topic}' not found.")
                 return ''
@@ -48,17 +70,18 @@ class AdvancedAGI:
 
     # Add other methods for remaining functionalities...
 
-# Example usage:
-agi = AdvancedAGI()
-question = "What is artificial intelligence?"
-result = agi.analyze_text(question)
-print("Analysis Result:", result)
+if __name__ == "__main__":
+    # Example usage:
+    agi = AdvancedAGI()
+    question = "What is artificial intelligence?"
+    result = agi.analyze_text(question)
+    print("Analysis Result:", result)
 
-topic = "Artificial intelligence"
-information = agi.gather_information(topic)
-print("Gathered Information:", information)
+    topic = "Artificial intelligence"
+    information = agi.gather_information(topic)
+    print("Gathered Information:", information)
 
-# Process data with dynamic processors
-data = "Raw data to be processed"
-processed_data = agi.process_data_with_processors(data)
-print("Processed Data:", processed_data)
+    # Process data with dynamic processors
+    data = "Raw data to be processed"
+    processed_data = agi.process_data_with_processors(data)
+    print("Processed Data:", processed_data)
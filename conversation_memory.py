@@ -0,0 +1,109 @@
+# conversation_memory.py
+
+import bisect
+import json
+import os
+from collections import deque
+
+
+class SegmentStore:
+    """On-disk store for memory entries spilled out of the in-memory ring.
+
+    Entries are appended in immutable JSON-lines segments named by the global
+    index range they cover, so the store's length is known from a directory
+    listing and a spill repeated after a crash is detected and skipped.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._starts = []       # first global index of each segment
+        self._ends = []         # one past the last global index of each segment
+        self._cached = (None, None)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        for file in sorted(os.listdir(directory)):
+            if file.endswith(".jsonl"):
+                start, end = file[:-6].split("_")
+                self._starts.append(int(start))
+                self._ends.append(int(end))
+
+    def __len__(self):
+        return self._ends[-1] if self._ends else 0
+
+    def _path(self, i):
+        return os.path.join(self.directory, f"{self._starts[i]:012d}_{self._ends[i]:012d}.jsonl")
+
+    def write(self, start, entries):
+        """Persist entries as a new segment beginning at global index `start`"""
+        if start < len(self) or not entries:
+            return  # already spilled before a crash
+        end = start + len(entries)
+        path = os.path.join(self.directory, f"{start:012d}_{end:012d}.jsonl")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._starts.append(start)
+        self._ends.append(end)
+
+    def _segment(self, i):
+        # Read the cache once: concurrent readers may replace it at any time
+        cached = self._cached
+        if cached[0] != i:
+            with open(self._path(i), "r", encoding="utf-8") as f:
+                cached = (i, [json.loads(line) for line in f])
+            self._cached = cached
+        return cached[1]
+
+    def get(self, index):
+        """Return the spilled entry with the given global index"""
+        i = bisect.bisect_right(self._starts, index) - 1
+        if i < 0 or index >= self._ends[i]:
+            raise IndexError(index)
+        return self._segment(i)[index - self._starts[i]]
+
+    def __iter__(self):
+        for i in range(len(self._starts)):
+            with open(self._path(i), "r", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+
+
+class ContextWindow:
+    """Rolling conversation context bounded by a character budget.
+
+    Turns are kept as separate chunks and only joined when the text is read,
+    so appending never copies the accumulated context.
+    """
+
+    def __init__(self, budget=8000, text=""):
+        self.budget = budget
+        self._chunks = deque()
+        self._size = 0
+        self._text = None
+        if text:
+            self.append(text)
+
+    def append(self, chunk: str):
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        while self._size > self.budget and len(self._chunks) > 1:
+            self._size -= len(self._chunks.popleft())
+        if self._size > self.budget:
+            # A single oversized turn keeps only its most recent text
+            tail = self._chunks.pop()[-self.budget:] if self.budget else ""
+            self._chunks.append(tail)
+            self._size = len(tail)
+        self._text = None
+
+    def __len__(self):
+        return self._size
+
+    def __str__(self):
+        if self._text is None:
+            self._text = "".join(self._chunks)
+        return self._text
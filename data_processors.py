@@ -1,8 +1,14 @@
 # data_processors.py
 
+import os
+import threading
+from itertools import islice
+
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.preprocessing import normalize
+from sklearn.utils._openmp_helpers import _openmp_effective_n_threads
 
 def process_data(data):
     # Placeholder function to process data
@@ -19,14 +25,131 @@ def normalize_data(data):
     normalized_data = data.lower()  # Normalize data to lowercase
     return normalized_data
 
-def vectorize_data(data):
+class StreamingVectorizer:
+    """Hashed TF-IDF over a stream of documents with bounded memory.
+
+    Terms are hashed into n_features columns, so there is no vocabulary to
+    hold, and document frequencies are accumulated chunk by chunk. Each chunk
+    is weighted with the IDF of every document seen so far (including the
+    chunk itself) using TfidfVectorizer's smoothed formula and L2-normalised.
+    Memory is one chunk plus the document-frequency array.
+    """
+
+    def __init__(self, n_features=2 ** 18):
+        self.n_features = n_features
+        self.hasher = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None)
+        self.df = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+
+    def partial_fit(self, documents):
+        """Add a chunk of documents to the frequency statistics; returns its term counts"""
+        counts = self.hasher.transform(documents).tocsr()
+        counts.sum_duplicates()
+        self.df += np.bincount(counts.indices, minlength=self.n_features)
+        self.n_docs += counts.shape[0]
+        return counts
+
+    def idf(self):
+        return np.log((1 + self.n_docs) / (1 + self.df)) + 1.0
+
+    def transform(self, documents, counts=None):
+        """TF-IDF rows for documents under the statistics gathered so far"""
+        if counts is None:
+            counts = self.hasher.transform(documents).tocsr()
+        weighted = counts.astype(np.float64)
+        weighted.data *= self.idf()[weighted.indices]
+        return normalize(weighted, copy=False)
+
+    def transform_stream(self, documents, chunk_size=1000):
+        """Yield one sparse TF-IDF matrix per chunk of an iterable of documents"""
+        documents = iter(documents)
+        while True:
+            chunk = list(islice(documents, chunk_size))
+            if not chunk:
+                return
+            yield self.transform(chunk, self.partial_fit(chunk))
+
+def vectorize_data(data, stream=False, chunk_size=1000, n_features=2 ** 18):
     # Placeholder function to vectorize data
+    if stream:
+        # Out-of-core: data may be any iterable or generator of documents
+        return StreamingVectorizer(n_features).transform_stream(data, chunk_size)
     vectorizer = TfidfVectorizer()
     vectorized_data = vectorizer.fit_transform(data)
     return vectorized_data
 
-def cluster_data(data):
+class OnlineClusterer:
+    """Mini-batch k-means that learns from sparse batches across runs.
+
+    partial_fit() updates the centroids from one batch only, so the cost of
+    an update scales with the new data; predict() assigns documents to the
+    nearest centroid without refitting. The centroids and their per-cluster
+    counts are saved to `path` as plain arrays (.npz, no pickled objects)
+    after each update and restored into a fresh model by the next run.
+    Batches must share a fixed feature space, such as the hashed features of
+    vectorize_data(..., stream=True).
+    """
+
+    def __init__(self, n_clusters=3, path=None, random_state=0):
+        self.path = path
+        self.model = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+        if path is not None and os.path.exists(path):
+            self._restore(path)
+        self._lock = threading.Lock()
+
+    def _restore(self, path):
+        with np.load(path, allow_pickle=False) as saved:
+            centers = saved["centers"]
+            if centers.shape[0] != self.model.n_clusters:
+                return  # saved with another cluster count: start over
+            model = self.model
+            model.cluster_centers_ = centers
+            model.n_features_in_ = centers.shape[1]
+            model.n_steps_ = int(saved["steps"])
+            # Internals partial_fit and predict expect once the model has centres
+            model._counts = saved["counts"]
+            model._n_since_last_reassign = int(saved["since_reassign"])
+            model._batch_size = int(saved["batch_size"])
+            model._n_features_out = centers.shape[0]
+            model._n_threads = _openmp_effective_n_threads()
+
+    @property
+    def fitted(self):
+        return hasattr(self.model, "cluster_centers_")
+
+    def partial_fit(self, batch):
+        with self._lock:
+            self.model.partial_fit(batch)
+            if self.path is not None:
+                self.save()
+        return self
+
+    def predict(self, batch):
+        return self.model.predict(batch)
+
+    def save(self):
+        model = self.model
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, centers=model.cluster_centers_, counts=model._counts,
+                     steps=model.n_steps_, since_reassign=model._n_since_last_reassign,
+                     batch_size=model._batch_size)
+        os.replace(tmp, self.path)
+
+_clusterers = {}    # state path -> OnlineClusterer, so repeated calls skip the reload
+
+def cluster_data(data, online=False, n_clusters=3, state_path="cluster_state.npz"):
     # Placeholder function to cluster data
-    kmeans = KMeans(n_clusters=3)
+    if online:
+        # Incremental: update persisted centroids with this batch, then assign it
+        clusterer = _clusterers.get(state_path)
+        # A different cluster count starts a new model (and replaces the saved one)
+        if clusterer is None or clusterer.model.n_clusters != n_clusters:
+            clusterer = _clusterers[state_path] = OnlineClusterer(n_clusters, state_path)
+        return clusterer.partial_fit(data).predict(data)
+    kmeans = KMeans(n_clusters=n_clusters)
     clustered_data = kmeans.fit_predict(data)
     return clustered_data
+
+# Processor chain run by AdvancedAGI.process_data_with_processors, in order
+PROCESSORS = [normalize_data, tokenize_data, vectorize_data, cluster_data]
@@ -6,6 +6,7 @@ import logging
 import concurrent.futures
 import requests
 import wikipediaapi
+from wiki_cache import WikiPageCache
 import tensorflow as tf
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import Dense, Reshape, Conv2D, LeakyReLU, Flatten, Dropout, BatchNormalization, MaxPooling2D
@@ -43,7 +44,7 @@ class AdvancedDataProcessor:
         return processed_data
 
 class AdvancedAGIManager:
-    def __init__(self, config_file="config.ini"):
+    def __init__(self, config_file="config.ini", wikipedia_client=None):
         self.is_running = False
         self.logger = self.setup_logger()
         self.config_file = config_file
@@ -52,7 +53,12 @@ class AdvancedAGIManager:
         self.generator = self.load_or_build_generator()
         self.search_index_path = self.config['SearchEngine']['index_path']
         self.data_processor = AdvancedDataProcessor()
-        self.wikipedia = wikipediaapi.Wikipedia('en')
+        self.wikipedia = wikipedia_client or wikipediaapi.Wikipedia('en')
+        self.wiki_cache = WikiPageCache(
+            self.wikipedia,
+            directory=self.config.get('WikipediaCache', 'directory', fallback='.wiki_cache'),
+            ttl=self.config.getfloat('WikipediaCache', 'ttl', fallback=24 * 3600.0),
+            max_bytes=self.config.getint('WikipediaCache', 'max_bytes', fallback=256 * 2 ** 20))
         self.init_search_index()
         self.metric_logger = self.setup_metric_logger()
 
@@ -186,9 +192,9 @@ class AdvancedAGIManager:
                     self.logger.error(f"Error fetching data: {e}", exc_info=True)
 
     def fetch_data_from_wikipedia(self, topic):
-        page = self.wikipedia.page(topic)
-        if page.exists():
-            return page.text
+        text = self.wiki_cache.get(topic)
+        if text is not None:
+            return text
         else:
             self.logger.error(f"Wikipedia page for '{topic}' not found.")
             return ''
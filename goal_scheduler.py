@@ -0,0 +1,128 @@
+# goal_scheduler.py
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class GoalStats:
+    """Running cost (seconds) and value estimates for one goal"""
+
+    def __init__(self, value=1.0):
+        self.value = value
+        self.cost = 0.0
+        self.runs = 0
+        self.last_result = None
+
+    @property
+    def priority(self):
+        # Cheap, productive goals first; untried goals get a nominal cost
+        return self.value / (self.cost or 1e-3)
+
+
+class GoalScheduler:
+    """Priority scheduler for an agent's autonomous goals.
+
+    Goals are ordered by value per second of cost, both tracked as moving
+    averages. Submitting a goal that is already queued merges into the queued
+    entry. The loop backs off exponentially while interactive prompts are
+    arriving or while goals stop producing new results, and resets to the base
+    interval when a goal produces something new. The loop runs on a daemon
+    thread, so a missed stop() cannot hang interpreter exit; stop() wakes
+    and joins it, so a goal in progress still finishes cleanly.
+    """
+
+    def __init__(self, pursue, goals=(), interval=6.0, max_interval=120.0,
+                 busy_window=10.0, smoothing=0.3, clock=time.monotonic):
+        self.pursue = pursue            # goal -> result; a changed result means progress
+        self.recurring = list(goals)
+        self.interval = interval
+        self.max_interval = max_interval
+        self.busy_window = busy_window  # seconds after a prompt during which we yield
+        self.smoothing = smoothing
+        self.clock = clock
+        self.stats = {}
+        self._heap = []
+        self._queued = set()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_interactive = float("-inf")
+        self.delay = interval
+
+    def submit(self, goal, value=None):
+        """Queue a goal, coalescing it with an identical queued goal"""
+        with self._lock:
+            stats = self.stats.setdefault(goal, GoalStats())
+            if value is not None:
+                stats.value = max(stats.value, value)
+            self._queued.add(goal)
+            heapq.heappush(self._heap, (-stats.priority, next(self._counter), goal))
+
+    def _pop(self):
+        with self._lock:
+            if not self._heap:
+                for goal in self.recurring:
+                    if goal not in self._queued:
+                        stats = self.stats.setdefault(goal, GoalStats())
+                        self._queued.add(goal)
+                        heapq.heappush(self._heap, (-stats.priority, next(self._counter), goal))
+            while self._heap:
+                _, _, goal = heapq.heappop(self._heap)
+                if goal in self._queued:  # skip entries superseded by a merge
+                    self._queued.discard(goal)
+                    return goal
+            return None
+
+    def note_interactive(self):
+        """Record an interactive prompt so autonomous work yields to it"""
+        self._last_interactive = self.clock()
+
+    def run_once(self):
+        """Pursue the best goal unless the agent is busy; returns the next delay"""
+        if self.clock() - self._last_interactive < self.busy_window:
+            self.delay = min(self.delay * 2, self.max_interval)
+            return self.delay
+        goal = self._pop()
+        if goal is None:
+            self.delay = min(self.delay * 2, self.max_interval)
+            return self.delay
+        stats = self.stats[goal]
+        started = self.clock()
+        try:
+            result = self.pursue(goal)
+        except Exception as e:
+            print(f"[Error] Goal '{goal}' failed: {e}")
+            result = stats.last_result
+        elapsed = self.clock() - started
+        a = self.smoothing
+        productive = result != stats.last_result
+        stats.cost = elapsed if not stats.runs else (1 - a) * stats.cost + a * elapsed
+        stats.value = (1 - a) * stats.value + a * (1.0 if productive else 0.0)
+        stats.runs += 1
+        stats.last_result = result
+        self.delay = self.interval if productive else min(self.delay * 2, self.max_interval)
+        return self.delay
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="goal-scheduler", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        delay = self.interval
+        while not self._stop.wait(delay):
+            delay = self.run_once()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
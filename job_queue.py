@@ -0,0 +1,184 @@
+# job_queue.py
+
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from latency import LatencyHistogram
+
+_current = threading.local()
+
+
+def report_progress(fraction, message=None):
+    """Update the progress of the job running on this thread (no-op elsewhere)"""
+    job = getattr(_current, "job", None)
+    if job is not None:
+        job.progress = fraction
+        job.message = message
+
+
+class Job(Future):
+    """Future for one queued job, with its progress and timings"""
+
+    def __init__(self, job_id, name):
+        super().__init__()
+        self.id = job_id
+        self.name = name
+        self.progress = 0.0
+        self.message = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+
+    @property
+    def queue_seconds(self):
+        if self.started is None:
+            return time.monotonic() - self.submitted
+        return self.started - self.submitted
+
+    @property
+    def run_seconds(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def as_dict(self):
+        state = "done" if self.done() else "running" if self.running() else "queued"
+        return {
+            "id": self.id,
+            "name": self.name,
+            "state": state,
+            "progress": self.progress,
+            "message": self.message,
+            "queue_seconds": self.queue_seconds,
+            "run_seconds": self.run_seconds,
+        }
+
+
+class JobQueue:
+    """Bounded queue of jobs run by a fixed pool of worker threads.
+
+    submit() returns a Job future straight away while fewer than
+    `max_pending` jobs are waiting; beyond that it blocks until a worker
+    frees a slot (or raises queue.Full when block=False or the timeout
+    expires), so producers can feed thousands of items without creating a
+    thread or holding a result per item ahead of the workers. Jobs report
+    progress through report_progress() from inside the job function.
+    """
+
+    def __init__(self, workers=4, max_pending=100, name="job"):
+        self.workers = workers
+        self.name = name
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.queue_delay = LatencyHistogram()
+        self.run_time = LatencyHistogram()
+        self._queue = queue.Queue(max_pending)
+        self._active = {}       # job id -> unfinished Job
+        self._ids = itertools.count(1)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _start_workers(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, daemon=True,
+                                          name=f"{self.name}-{len(self._threads)}")
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn, *args, name=None, block=True, timeout=None, **kwargs):
+        """Queue fn(*args, **kwargs); returns its Job"""
+        if self._closed:
+            raise RuntimeError("cannot submit to a job queue after shutdown")
+        if len(self._threads) < self.workers:
+            self._start_workers()
+        job = Job(next(self._ids), name or getattr(fn, "__name__", "job"))
+        with self._lock:
+            self._active[job.id] = job
+        try:
+            self._queue.put((job, fn, args, kwargs), block, timeout)
+        except queue.Full:
+            with self._lock:
+                del self._active[job.id]
+            raise
+        with self._lock:
+            self.submitted += 1
+        return job
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            job, fn, args, kwargs = item
+            if not job.set_running_or_notify_cancel():
+                with self._lock:
+                    self._active.pop(job.id, None)
+                continue
+            job.started = time.monotonic()
+            _current.job = job
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                job.finished = time.monotonic()
+                self._finish(job, failed=True)
+                job.set_exception(e)
+            else:
+                job.finished = time.monotonic()
+                job.progress = 1.0
+                self._finish(job, failed=False)
+                job.set_result(result)
+            finally:
+                _current.job = None
+
+    def _finish(self, job, failed):
+        with self._lock:
+            self._active.pop(job.id, None)
+            self.queue_delay.observe(job.started - job.submitted)
+            self.run_time.observe(job.finished - job.started)
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def status(self):
+        """Progress and timings of every queued or running job"""
+        with self._lock:
+            jobs = list(self._active.values())
+        return [job.as_dict() for job in jobs]
+
+    def stats(self):
+        with self._lock:
+            running = sum(job.running() for job in self._active.values())
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "running": running,
+                "queued": len(self._active) - running,
+                "queue_delay": {q: self.queue_delay.quantile(v) for q, v in
+                                (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))},
+                "run_time": {q: self.run_time.quantile(v) for q, v in
+                             (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))},
+            }
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """Stop accepting jobs; queued jobs still run unless cancel_pending is set"""
+        self._closed = True
+        if cancel_pending:
+            with self._lock:
+                pending = [job for job in self._active.values() if not job.running()]
+            for job in pending:
+                job.cancel()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,263 @@
+# knowledge_graph.py
+
+import mmap
+import os
+import struct
+from array import array
+from collections import deque
+
+MAGIC = b"VKG1"
+# magic, journal seq, nodes, edges, edge types, name blob bytes, type blob bytes
+HEADER = struct.Struct("<4sQQQQQQ")
+
+
+def _pad(n):
+    return (8 - n % 8) % 8
+
+
+class KnowledgeGraph:
+    """Directed, typed multigraph with interned node names.
+
+    Edges loaded from disk live in CSR arrays (row pointers, 4-byte target ids
+    and 2-byte edge-type ids) memory-mapped straight from the file, so opening
+    a graph costs nothing per edge and each stored edge takes 6 bytes. Names
+    are looked up by binary search over a sorted permutation in the file.
+    Edges added since loading go to a per-node delta and are merged into the
+    CSR arrays by save().
+    """
+
+    def __init__(self):
+        self.seq = 0                # journal sequence number the file reflects
+        self._mmap = None
+        self._base_nodes = 0
+        self._name_offsets = ()     # base node id -> offset into _name_blob
+        self._name_blob = b""
+        self._sorted = ()           # base node ids ordered by encoded name
+        self._indptr = (0,)
+        self._dst = ()
+        self._etype = ()
+        self._new_names = []        # names of nodes added since loading
+        self._new_ids = {}
+        self._delta = {}            # node id -> array of (etype << 32 | dst)
+        self._delta_edges = 0
+        self._types = []
+        self._type_ids = {}
+
+    # -- nodes -----------------------------------------------------------
+
+    def __len__(self):
+        return self._base_nodes + len(self._new_names)
+
+    def __contains__(self, name):
+        return self.node_id(name) is not None
+
+    @property
+    def num_edges(self):
+        return len(self._dst) + self._delta_edges
+
+    def name(self, node_id: int) -> str:
+        if node_id < self._base_nodes:
+            return self._base_key(node_id).decode("utf-8")
+        return self._new_names[node_id - self._base_nodes]
+
+    def _base_key(self, node_id):
+        offsets = self._name_offsets
+        return bytes(self._name_blob[offsets[node_id]:offsets[node_id + 1]])
+
+    def node_id(self, name: str):
+        """Return the id of a node, or None if it does not exist"""
+        node_id = self._new_ids.get(name)
+        if node_id is not None or not self._base_nodes:
+            return node_id
+        key = name.encode("utf-8")
+        lo, hi = 0, self._base_nodes
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._base_key(self._sorted[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._base_nodes and self._base_key(self._sorted[lo]) == key:
+            return self._sorted[lo]
+        return None
+
+    def intern(self, name: str) -> int:
+        node_id = self.node_id(name)
+        if node_id is None:
+            node_id = len(self)
+            self._new_names.append(name)
+            self._new_ids[name] = node_id
+        return node_id
+
+    def _type_id(self, etype):
+        type_id = self._type_ids.get(etype)
+        if type_id is None:
+            type_id = self._type_ids[etype] = len(self._types)
+            self._types.append(etype)
+        return type_id
+
+    # -- edges -----------------------------------------------------------
+
+    def add_edge(self, src: str, dst: str, etype="related"):
+        """Add src -[etype]-> dst unless it repeats the node's latest edge of that type"""
+        src_id, dst_id = self.intern(src), self.intern(dst)
+        packed = self._type_id(etype) << 32 | dst_id
+        for value in self._iter_edges_reversed(src_id):
+            if value >> 32 == packed >> 32:
+                if value == packed:
+                    return
+                break
+        edges = self._delta.get(src_id)
+        if edges is None:
+            edges = self._delta[src_id] = array("Q")
+        edges.append(packed)
+        self._delta_edges += 1
+
+    def _iter_edges(self, node_id):
+        if node_id < self._base_nodes:
+            dst, etype = self._dst, self._etype
+            for i in range(self._indptr[node_id], self._indptr[node_id + 1]):
+                yield etype[i] << 32 | dst[i]
+        yield from self._delta.get(node_id, ())
+
+    def _iter_edges_reversed(self, node_id):
+        yield from reversed(self._delta.get(node_id, ()))
+        if node_id < self._base_nodes:
+            dst, etype = self._dst, self._etype
+            for i in range(self._indptr[node_id + 1] - 1, self._indptr[node_id] - 1, -1):
+                yield etype[i] << 32 | dst[i]
+
+    def _type_filter(self, etype):
+        if etype is None:
+            return None
+        return self._type_ids.get(etype, -1)
+
+    def neighbors(self, name: str, etype=None):
+        """Out-neighbours of a node in insertion order, optionally of one edge type"""
+        node_id = self.node_id(name)
+        if node_id is None:
+            return []
+        wanted = self._type_filter(etype)
+        return [self.name(v & 0xFFFFFFFF) for v in self._iter_edges(node_id)
+                if wanted is None or v >> 32 == wanted]
+
+    def latest(self, name: str, etype=None):
+        """Most recently added out-neighbour, or None"""
+        node_id = self.node_id(name)
+        if node_id is None:
+            return None
+        wanted = self._type_filter(etype)
+        for v in self._iter_edges_reversed(node_id):
+            if wanted is None or v >> 32 == wanted:
+                return self.name(v & 0xFFFFFFFF)
+        return None
+
+    def k_hop(self, name: str, k: int, etype=None):
+        """Map each node reachable within k hops to its hop distance"""
+        start = self.node_id(name)
+        if start is None:
+            return {}
+        wanted = self._type_filter(etype)
+        seen = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            depth = seen[node]
+            if depth == k:
+                continue
+            for v in self._iter_edges(node):
+                if wanted is not None and v >> 32 != wanted:
+                    continue
+                nxt = v & 0xFFFFFFFF
+                if nxt not in seen:
+                    seen[nxt] = depth + 1
+                    queue.append(nxt)
+        del seen[start]
+        return {self.name(node): depth for node, depth in seen.items()}
+
+    # -- persistence -----------------------------------------------------
+
+    def save(self, path, seq=None):
+        """Write the graph (base and delta merged) atomically in binary form"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            self.write_to(f, seq)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def write_to(self, f, seq=None):
+        """Write the binary form to an open file; returns the bytes written"""
+        if seq is not None:
+            self.seq = seq
+        nodes = len(self)
+        names = [self.name(i).encode("utf-8") for i in range(nodes)]
+        name_offsets = array("Q", [0])
+        for encoded in names:
+            name_offsets.append(name_offsets[-1] + len(encoded))
+        ordered = array("I", sorted(range(nodes), key=names.__getitem__))
+        types = [t.encode("utf-8") for t in self._types]
+        type_offsets = array("Q", [0])
+        for encoded in types:
+            type_offsets.append(type_offsets[-1] + len(encoded))
+
+        indptr = array("Q", [0])
+        dst, etype = array("I"), array("H")
+        for node_id in range(nodes):
+            for v in self._iter_edges(node_id):
+                dst.append(v & 0xFFFFFFFF)
+                etype.append(v >> 32)
+            indptr.append(len(dst))
+
+        name_blob, type_blob = b"".join(names), b"".join(types)
+        written = f.write(HEADER.pack(MAGIC, self.seq, nodes, len(dst), len(types),
+                                      len(name_blob), len(type_blob)))
+        for chunk in (name_offsets, name_blob, ordered, type_offsets, type_blob,
+                      indptr, dst, etype):
+            data = chunk.tobytes() if isinstance(chunk, array) else chunk
+            written += f.write(data)
+            written += f.write(b"\0" * _pad(len(data)))
+        return written
+
+    @classmethod
+    def load(cls, path):
+        """Open a saved graph; its arrays are memory-mapped, not read"""
+        graph = cls()
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return graph
+            graph._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        graph._attach(memoryview(graph._mmap))
+        return graph
+
+    @classmethod
+    def from_buffer(cls, buf, owner=None):
+        """Open a graph embedded in a larger buffer; `owner` keeps the mapping alive"""
+        graph = cls()
+        graph._mmap = owner
+        graph._attach(buf)
+        return graph
+
+    def _attach(self, buf):
+        magic, self.seq, nodes, edges, ntypes, name_len, type_len = HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise ValueError("Not a knowledge graph file")
+        offset = HEADER.size
+
+        def take(nbytes, fmt=None):
+            nonlocal offset
+            view = buf[offset:offset + nbytes]
+            offset += nbytes + _pad(nbytes)
+            return view.cast(fmt) if fmt else view
+
+        self._base_nodes = nodes
+        self._name_offsets = take(8 * (nodes + 1), "Q")
+        self._name_blob = take(name_len)
+        self._sorted = take(4 * nodes, "I")
+        type_offsets = take(8 * (ntypes + 1), "Q")
+        type_blob = take(type_len)
+        self._indptr = take(8 * (nodes + 1), "Q")
+        self._dst = take(4 * edges, "I")
+        self._etype = take(2 * edges, "H")
+        for i in range(ntypes):
+            self._type_id(bytes(type_blob[type_offsets[i]:type_offsets[i + 1]]).decode("utf-8"))
@@ -0,0 +1,115 @@
+# latency.py
+
+import bisect
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+# Upper bounds in seconds: 1us to ~100s, four buckets per power of ten
+BUCKETS = tuple(round(10 ** (e / 4), 12) for e in range(-24, 9))
+_DISABLED = nullcontext()
+
+
+class LatencyHistogram:
+    """Fixed log-spaced latency histogram with interpolated percentiles"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class _Timer:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class LatencyRecorder:
+    """Per-stage latency histograms for the agent's reasoning path.
+
+    When disabled, stage() hands back a shared no-op context manager, so the
+    instrumented code pays one attribute check per stage.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _DISABLED
+        return _Timer(self, name)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Per-stage count, total and p50/p95/p99 latency in seconds"""
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "sum": h.sum,
+                    "p50": h.quantile(0.50),
+                    "p95": h.quantile(0.95),
+                    "p99": h.quantile(0.99),
+                }
+                for name, h in sorted(self._histograms.items())
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, metric="agent_stage_latency_seconds"):
+        """Prometheus text exposition of every stage histogram"""
+        lines = [f"# HELP {metric} Latency of agent reasoning stages.",
+                 f"# TYPE {metric} histogram"]
+        with self._lock:
+            for name, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {h.sum:.9f}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
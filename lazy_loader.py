@@ -0,0 +1,38 @@
+# lazy_loader.py
+
+import threading
+
+
+class LazyObject:
+    """Stand-in for an expensive object that is built on first use.
+
+    The factory runs once, under a lock, the first time an attribute is read
+    or the object is called; after that the proxy forwards to the built
+    object. load() builds it explicitly, e.g. from a server's warmup().
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._target is not None
+
+    def load(self):
+        target = self._target
+        if target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+                target = self._target
+        return target
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)  # keeps pickling and copying off the factory
+        return getattr(self.load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
@@ -0,0 +1,114 @@
+# memory_index.py
+
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str):
+    return TOKEN_RE.findall(text.lower())
+
+
+class MemoryIndex:
+    """Token-level inverted index over agent memory with BM25 ranking.
+
+    Documents are identified by their global memory index, so postings are
+    appended in increasing id order and the newest occurrences of a term sit
+    at the end of its list. Candidates come from the rarest query terms; the
+    commoner terms are then looked up for those candidates only, so an old
+    document is still found through its rare terms. Very common terms that
+    have to supply candidates contribute only their most recent `scan_limit`
+    postings, which keeps query cost bounded no matter how many interactions
+    are stored.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, scan_limit=2000):
+        self.k1 = k1
+        self.b = b
+        self.scan_limit = scan_limit
+        self._ids = {}              # token -> array of doc ids
+        self._tfs = {}              # token -> array of term frequencies
+        self._lengths = array("I")  # doc id -> token count (0 = not indexed)
+        self._docs = 0
+        self._total = 0
+
+    def __len__(self):
+        return self._docs
+
+    def add(self, doc_id: int, text: str):
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        if doc_id >= len(self._lengths):
+            self._lengths.extend([0] * (doc_id + 1 - len(self._lengths)))
+        self._lengths[doc_id] = len(tokens)
+        self._docs += 1
+        self._total += len(tokens)
+        for token, tf in Counter(tokens).items():
+            ids = self._ids.get(token)
+            if ids is None:
+                ids = self._ids[token] = array("I")
+                self._tfs[token] = array("H")
+            ids.append(doc_id)
+            self._tfs[token].append(min(tf, 0xFFFF))
+
+    def search(self, query: str, k=1, min_match=1.0):
+        """Return up to k (score, doc_id) pairs, best first.
+
+        A document must contain at least `min_match` of the distinct query
+        terms to be returned.
+        """
+        query_terms = set(tokenize(query))
+        terms = [t for t in query_terms if t in self._ids]
+        needed = max(1, math.ceil(min_match * len(query_terms)))
+        if not terms or len(terms) < needed:
+            return []
+        n = self._docs
+        avg = self._total / n
+        k1, lengths = self.k1, self._lengths
+        base, slope = k1 * (1 - self.b), k1 * self.b / avg
+        # A match holds `needed` of the terms, so it holds one of the
+        # len(terms) - needed + 1 rarest: their postings give the candidates
+        terms.sort(key=lambda t: len(self._ids[t]))
+        pivot = len(terms) - needed + 1
+        scores = {}
+        matched = Counter()
+        for term in terms[:pivot]:
+            ids, tfs = self._ids[term], self._tfs[term]
+            weight = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5)) * (k1 + 1)
+            start = max(0, len(ids) - self.scan_limit)
+            for doc, tf in zip(ids[start:], tfs[start:]):
+                scores[doc] = scores.get(doc, 0.0) + weight * tf / (tf + base + slope * lengths[doc])
+            matched.update(ids[start:])
+        # Commoner terms only score the candidates, looked up in full postings
+        candidates = sorted(scores)
+        for term in terms[pivot:]:
+            ids, tfs = self._ids[term], self._tfs[term]
+            weight = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5)) * (k1 + 1)
+            if len(ids) <= len(candidates):
+                found = ((doc, tf) for doc, tf in zip(ids, tfs) if doc in scores)
+            else:
+                found = self._lookup(ids, tfs, candidates)
+            for doc, tf in found:
+                scores[doc] += weight * tf / (tf + base + slope * lengths[doc])
+                matched[doc] += 1
+        hits = ((score, doc) for doc, score in scores.items() if matched[doc] >= needed)
+        # Ties go to the most recent interaction
+        return heapq.nlargest(k, hits)
+
+    @staticmethod
+    def _lookup(ids, tfs, docs):
+        """(doc, tf) for each of the sorted docs found in a posting list"""
+        lo = 0
+        for doc in docs:
+            i = bisect_left(ids, doc, lo)
+            if i == len(ids):
+                return
+            if ids[i] == doc:
+                yield doc, tfs[i]
+            lo = i
@@ -0,0 +1,172 @@
+# memory_similarity.py
+
+import zlib
+from collections import Counter, defaultdict
+
+import numpy as np
+from scipy import sparse
+
+from memory_index import tokenize
+
+
+def _feature(token, n_features):
+    # crc32 rather than hash(): stable across processes and restarts
+    return zlib.crc32(token.encode("utf-8")) % n_features
+
+
+class SimilarityIndex:
+    """Hashed TF-IDF vectors over stored prompts with cosine top-k recall.
+
+    Each prompt becomes a sparse row of hashed term weights (1 + log tf,
+    scaled by the IDF known when it was added) normalised to unit length.
+    Rows are kept in frozen CSR blocks plus a small pending block, so adding a
+    prompt never rebuilds the matrix, and a query is one sparse product per
+    block followed by argpartition. Beyond `approximate_after` rows, queries
+    switch to random-hyperplane LSH: only rows whose signature matches the
+    query's, or differs from it in one bit, in at least one table are scored.
+    """
+
+    def __init__(self, n_features=2 ** 16, block_size=4096, approximate_after=100_000,
+                 n_tables=8, n_bits=12, seed=0):
+        self.n_features = n_features
+        self.block_size = block_size
+        self.approximate_after = approximate_after
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.seed = seed
+        self._df = np.zeros(n_features, dtype=np.int64)
+        self._docs = 0
+        self._blocks = []           # frozen CSR blocks
+        self._block_ids = []        # doc ids of each frozen block's rows
+        self._pending = []          # (feature indices, weights) of unfrozen rows
+        self._pending_ids = []
+        self._pending_block = None  # CSR cache of the pending rows
+        self._planes = None         # random hyperplanes, created with the LSH tables
+        self._powers = 1 << np.arange(n_bits, dtype=np.int64)
+        self._buckets = None        # per table: signature -> list of (block, row)
+
+    def __len__(self):
+        return self._docs
+
+    @property
+    def approximate(self):
+        return self._buckets is not None
+
+    def _idf(self, features):
+        return np.log((1 + self._docs) / (1 + self._df[features])) + 1.0
+
+    def _vector(self, text):
+        counts = Counter(_feature(t, self.n_features) for t in tokenize(text))
+        if not counts:
+            return None, None
+        features = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        return features, tf
+
+    def _weights(self, features, tf):
+        weights = (1.0 + np.log(tf)) * self._idf(features)
+        norm = np.linalg.norm(weights)
+        return (weights / norm).astype(np.float32) if norm else None
+
+    def add(self, doc_id: int, text: str):
+        features, tf = self._vector(text)
+        if features is None:
+            return
+        self._df[features] += 1
+        self._docs += 1
+        weights = self._weights(features, tf)
+        if weights is None:
+            return
+        self._pending.append((features, weights))
+        self._pending_ids.append(doc_id)
+        self._pending_block = None
+        if len(self._pending) >= self.block_size:
+            self._freeze()
+        if self._buckets is None and self._docs > self.approximate_after:
+            self._build_buckets()
+
+    def _csr(self, rows):
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(f) for f, _ in rows], out=indptr[1:])
+        indices = np.concatenate([f for f, _ in rows])
+        data = np.concatenate([w for _, w in rows])
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), self.n_features))
+
+    def _freeze(self):
+        block = self._csr(self._pending)
+        self._blocks.append(block)
+        self._block_ids.append(np.asarray(self._pending_ids, dtype=np.int64))
+        self._pending, self._pending_ids, self._pending_block = [], [], None
+        if self._buckets is not None:
+            self._bucket_block(len(self._blocks) - 1)
+
+    def _signatures(self, projected):
+        """LSH signature per table from hyperplane projections, shape (rows, n_tables)"""
+        bits = np.asarray(projected).reshape(-1, self.n_tables, self.n_bits) > 0
+        return bits.astype(np.int64) @ self._powers
+
+    def _bucket_block(self, b):
+        signatures = self._signatures(self._blocks[b] @ self._planes)
+        for row, row_signatures in enumerate(signatures):
+            for table, signature in enumerate(row_signatures):
+                self._buckets[table][int(signature)].append((b, row))
+
+    def _build_buckets(self):
+        rng = np.random.default_rng(self.seed)
+        self._planes = rng.standard_normal(
+            (self.n_features, self.n_tables * self.n_bits)).astype(np.float32)
+        self._buckets = [defaultdict(list) for _ in range(self.n_tables)]
+        for b in range(len(self._blocks)):
+            self._bucket_block(b)
+
+    def _query(self, text):
+        """(feature indices, weights) of a query, or None if no term is known"""
+        features, tf = self._vector(text)
+        if features is None:
+            return None
+        keep = self._df[features] > 0   # unseen terms cannot contribute
+        if not keep.any():
+            return None
+        return features[keep], self._weights(features[keep], tf[keep])
+
+    def search(self, text: str, k=1):
+        """Return up to k (cosine similarity, doc_id) pairs, most similar first"""
+        query = self._query(text)
+        if query is None:
+            return []
+        features, weights = query
+        # Dense query vector: sparse-matrix x dense-vector is a single kernel call
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        vector[features] = weights
+        scores, ids = [], []
+        if self._buckets is None:
+            for block, block_ids in zip(self._blocks, self._block_ids):
+                scores.append(block @ vector)
+                ids.append(block_ids)
+        else:
+            candidates = defaultdict(set)
+            signatures = self._signatures(weights @ self._planes[features])
+            for table, signature in enumerate(signatures[0]):
+                buckets = self._buckets[table]
+                for probe in (0, *self._powers):
+                    for b, row in buckets.get(int(signature) ^ int(probe), ()):
+                        candidates[b].add(row)
+            for b, rows in candidates.items():
+                rows = np.fromiter(rows, dtype=np.int64, count=len(rows))
+                scores.append(self._blocks[b][rows] @ vector)
+                ids.append(self._block_ids[b][rows])
+        if self._pending:
+            # Unfrozen rows are few, so they are always scored exactly
+            if self._pending_block is None:
+                self._pending_block = self._csr(self._pending)
+            scores.append(self._pending_block @ vector)
+            ids.append(np.asarray(self._pending_ids, dtype=np.int64))
+        if not scores:
+            return []
+        scores, ids = np.concatenate(scores), np.concatenate(ids)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), int(ids[i])) for i in top if scores[i] > 0]
@@ -0,0 +1,120 @@
+# micro_batcher.py
+
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+from latency import LatencyHistogram
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Collect concurrent requests into batches for one batched call.
+
+    `fn` takes a list of inputs and returns a list of results in the same
+    order. A worker thread takes the first waiting request, then keeps
+    collecting until `max_batch_size` requests are queued or `max_wait`
+    seconds have passed since that first request, and resolves each caller's
+    Future from the single batched call. If a batch fails, its requests are
+    retried one at a time so a bad input only fails its own caller.
+    """
+
+    def __init__(self, fn, max_batch_size=16, max_wait=0.01, name="micro-batcher"):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self.batch_sizes = Counter()            # batch size -> number of batches
+        self.queue_delay = LatencyHistogram()   # seconds from submit to batch start
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, item):
+        """Queue one input; returns a Future for its result"""
+        future = Future()
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                    self._thread.start()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                self._queue.put(_STOP)  # finish this batch, stop on the next
+                break
+            batch.append(request)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            with self._lock:
+                self.batch_sizes[len(batch)] += 1
+                for _, _, queued in batch:
+                    self.queue_delay.observe(started - queued)
+            self._run([request for request in batch if request[1].set_running_or_notify_cancel()])
+
+    def _run(self, batch):
+        if not batch:
+            return
+        try:
+            results = self.fn([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"batch of {len(batch)} returned {len(results)} results")
+        except Exception as e:
+            if len(batch) > 1:
+                for request in batch:
+                    self._run([request])
+            else:
+                batch[0][1].set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        """Batch-size distribution and queueing delay percentiles (seconds)"""
+        with self._lock:
+            batches = sum(self.batch_sizes.values())
+            requests = sum(size * n for size, n in self.batch_sizes.items())
+            return {
+                "batches": batches,
+                "requests": requests,
+                "mean_batch_size": requests / batches if batches else 0.0,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "queue_delay": {
+                    "p50": self.queue_delay.quantile(0.50),
+                    "p95": self.queue_delay.quantile(0.95),
+                    "p99": self.queue_delay.quantile(0.99),
+                },
+            }
+
+    def close(self):
+        """Finish queued requests and stop the worker"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
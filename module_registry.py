@@ -0,0 +1,195 @@
+# module_registry.py
+
+import ctypes
+import ctypes.util
+import importlib
+import os
+import select
+import struct
+import sys
+import threading
+import weakref
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _inotify_libc():
+    """Return libc if it exposes inotify, else None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class ModuleSubscription:
+    """One consumer's queue of modules loaded or reloaded since its last drain"""
+
+    def __init__(self, registry):
+        self._registry = registry
+        self._pending = {}      # name -> module
+
+    def drain(self):
+        """Return (name, module) pairs loaded or reloaded since the last call"""
+        if not self._pending:
+            return []
+        with self._registry._lock:
+            pending, self._pending = self._pending, {}
+        return list(pending.items())
+
+
+class ModuleRegistry:
+    """Loaded ai_modules plugins, kept current by a directory watcher.
+
+    The directory is scanned once up front; afterwards a background thread
+    picks up new, changed and removed plugins through inotify, or by polling
+    file mtimes where inotify is unavailable. Callers only read in-memory
+    structures, so the reasoning path never touches the filesystem.
+
+    Several agents can share one registry: each calls subscribe() and drains
+    its own subscription, so every agent sees every load exactly once.
+    """
+
+    def __init__(self, module_dir, package="ai_modules", poll_interval=2.0):
+        self.module_dir = module_dir
+        self.package = package
+        self.poll_interval = poll_interval
+        self.modules = {}       # name -> live module object
+        self._mtimes = {}
+        self._lock = threading.Lock()
+        self._subscriptions = weakref.WeakSet()
+        self._default = self.subscribe()    # backs drain()
+        self._stop = threading.Event()
+        self._thread = None
+        self.rescan()
+
+    def __contains__(self, name):
+        return name in self.modules
+
+    def __len__(self):
+        return len(self.modules)
+
+    def _scan(self):
+        mtimes = {}
+        for entry in os.scandir(self.module_dir):
+            if entry.name.endswith(".py") and entry.is_file():
+                mtimes[entry.name[:-3]] = entry.stat().st_mtime_ns
+        return mtimes
+
+    def rescan(self):
+        """Synchronise with the directory contents by comparing mtimes"""
+        mtimes = self._scan()
+        for name in list(self._mtimes):
+            if name not in mtimes:
+                self._unload(name)
+        for name, mtime in mtimes.items():
+            if self._mtimes.get(name) != mtime:
+                self._mtimes[name] = mtime
+                self._load(name)
+
+    def _load(self, name):
+        try:
+            importlib.invalidate_caches()
+            module = self.modules.get(name)
+            if module is None:
+                module = importlib.import_module(f"{self.package}.{name}")
+            else:
+                module = importlib.reload(module)
+        except Exception as e:
+            print(f"[Error] Failed to load {name}: {e}")
+            return
+        with self._lock:
+            self.modules[name] = module
+            for subscription in self._subscriptions:
+                subscription._pending[name] = module
+
+    def _unload(self, name):
+        self._mtimes.pop(name, None)
+        with self._lock:
+            self.modules.pop(name, None)
+            for subscription in self._subscriptions:
+                subscription._pending.pop(name, None)
+        sys.modules.pop(f"{self.package}.{name}", None)
+
+    def mtime(self, name):
+        """Modification time (ns) of a module's file when it was last loaded"""
+        return self._mtimes.get(name)
+
+    def subscribe(self):
+        """New subscription whose first drain returns every loaded module"""
+        subscription = ModuleSubscription(self)
+        with self._lock:
+            subscription._pending = dict(self.modules)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def drain(self):
+        """Return (name, module) pairs loaded or reloaded since the last call"""
+        return self._default.drain()
+
+    def start(self):
+        """Start watching the module directory for changes"""
+        if self._thread is None:
+            self._stop.clear()
+            self._wake = os.pipe()  # written by stop() to interrupt select()
+            self._thread = threading.Thread(target=self._watch, args=(self._wake[0],), daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            os.write(self._wake[1], b"\0")
+            self._thread.join()
+            self._thread = None
+            for fd in self._wake:
+                os.close(fd)
+
+    def _watch(self, wake):
+        libc = _inotify_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC) if libc else -1
+        if fd < 0:
+            self._poll()
+            return
+        try:
+            mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+            if libc.inotify_add_watch(fd, os.fsencode(self.module_dir), mask) < 0:
+                self._poll()
+                return
+            self.rescan()  # catch changes made before the watch was armed
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd, wake], [], [], self.poll_interval)
+                if fd not in ready:
+                    continue
+                changed = False
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                while offset < len(data):
+                    _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                    offset += EVENT_HEADER.size
+                    name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                    offset += length
+                    changed = changed or name.endswith(".py")
+                if changed:
+                    self.rescan()
+        finally:
+            os.close(fd)
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.rescan()
+            except OSError as e:
+                print(f"[Error] Failed to scan {self.module_dir}: {e}")
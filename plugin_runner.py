@@ -0,0 +1,260 @@
+# plugin_runner.py
+
+import importlib
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_loaded = {}    # worker-side cache: qualified module name -> (mtime, module)
+
+
+def _run_plugin(root, qualified, mtime, context):
+    """Worker entry point: import (or re-import after a change) and call run()"""
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    cached = _loaded.get(qualified)
+    if cached is None:
+        importlib.invalidate_caches()
+        module = importlib.import_module(qualified)
+    elif cached[0] != mtime:
+        module = importlib.reload(cached[1])
+    else:
+        module = cached[1]
+    _loaded[qualified] = (mtime, module)
+    return module.run(context)
+
+
+class PluginStats:
+    """Call, failure and latency counters for one module"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.total_latency = 0.0
+        self.last_error = None
+        self.disabled = False
+
+    def as_dict(self):
+        completed = self.calls - self.timeouts
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "avg_latency": self.total_latency / completed if completed > 0 else 0.0,
+            "last_error": self.last_error,
+            "disabled": self.disabled,
+        }
+
+
+class PluginRunner:
+    """Run ai_modules `run` hooks in worker processes with per-call timeouts.
+
+    submit() returns a Future immediately. Calls beyond `max_workers` wait in a
+    backlog of up to `max_pending` calls and are dispatched as workers free
+    up; submit() raises queue.Full when the backlog is full. A watchdog fails
+    calls that exceed their timeout (counted from dispatch) and recycles the
+    worker pool, since a stuck worker cannot be interrupted any other way.
+    Modules that fail `max_failures` times in a row are disabled, and their
+    calls fail straight away, until enable() is called or observe() sees a
+    new version of the module (a hot reload).
+    """
+
+    def __init__(self, module_dir, package="ai_modules", max_workers=2, timeout=5.0,
+                 max_failures=3, max_pending=100):
+        self.root = os.path.dirname(os.path.abspath(module_dir))
+        self.package = package
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_failures = max_failures
+        self.max_pending = max_pending
+        self.stats = {}
+        self.skipped = 0        # calls rejected because the backlog was full
+        self._pool = None
+        self._inflight = {}     # pool future -> (name, context, deadline, started, caller future)
+        self._pending = deque() # (name, context, mtime, caller future) awaiting a worker
+        self._results = []      # (name, context, result or exception) awaiting collection
+        self._versions = {}     # name -> module mtime last passed to observe()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def _stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = PluginStats()
+        return stats
+
+    def enable(self, name):
+        with self._lock:
+            stats = self._stats(name)
+            stats.disabled = False
+            stats.consecutive_failures = 0
+
+    def observe(self, name, mtime):
+        """Note a loaded module version; returns True if the runner has not seen it.
+
+        A new version re-enables a module disabled for failing, so every
+        agent sharing the runner sees the same enable/disable decisions and a
+        version is only integrated once however many agents drain it.
+        """
+        with self._lock:
+            if name in self._versions and self._versions[name] == mtime:
+                return False
+            self._versions[name] = mtime
+            stats = self._stats(name)
+            stats.disabled = False
+            stats.consecutive_failures = 0
+            return True
+
+    def submit(self, name, context, mtime=None):
+        """Schedule module `name`'s run(context); returns a Future"""
+        caller = Future()
+        with self._lock:
+            if self._stats(name).disabled:
+                caller.set_exception(RuntimeError(f"module {name} is disabled"))
+                return caller
+            if len(self._inflight) >= self.max_workers and len(self._pending) >= self.max_pending:
+                self.skipped += 1
+                raise queue.Full(f"plugin backlog is full ({self.max_pending} calls)")
+            self._pending.append((name, context, mtime, caller))
+            dispatched = self._dispatch()
+        self._watch_dispatched(dispatched)
+        return caller
+
+    def _dispatch(self):
+        """Start backlogged calls while workers are free; call with the lock held"""
+        dispatched, failed = [], []
+        while self._pending and len(self._inflight) < self.max_workers:
+            name, context, mtime, caller = self._pending.popleft()
+            stats = self._stats(name)
+            if stats.disabled:
+                failed.append(caller)
+                continue
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, daemon=True)
+                self._watchdog.start()
+            started = time.monotonic()
+            inner = self._pool.submit(_run_plugin, self.root, f"{self.package}.{name}", mtime, context)
+            self._inflight[inner] = (name, context, started + self.timeout, started, caller)
+            stats.calls += 1
+            dispatched.append(inner)
+        return dispatched, failed
+
+    def _watch_dispatched(self, dispatched):
+        # Outside the lock: a callback on an already finished future runs immediately
+        inners, failed = dispatched
+        for caller in failed:
+            caller.set_exception(RuntimeError("module was disabled while its call was queued"))
+        for inner in inners:
+            inner.add_done_callback(self._finished)
+
+    def _finished(self, inner):
+        with self._lock:
+            entry = self._inflight.pop(inner, None)
+            if entry is None:
+                return  # already resolved by the watchdog
+            name, context, _, started, caller = entry
+            stats = self._stats(name)
+            error = inner.exception()
+            stats.total_latency += time.monotonic() - started
+            if error is None:
+                stats.consecutive_failures = 0
+                outcome = inner.result()
+            else:
+                self._fail(name, stats, error)
+                outcome = error
+            self._results.append((name, context, outcome))
+            dispatched = self._dispatch()
+        self._watch_dispatched(dispatched)
+        if error is None:
+            caller.set_result(outcome)
+        else:
+            caller.set_exception(error)
+
+    def _fail(self, name, stats, error):
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        stats.last_error = repr(error)
+        if stats.consecutive_failures >= self.max_failures and not stats.disabled:
+            stats.disabled = True
+            print(f"[Error] Disabled module {name} after {stats.consecutive_failures} failures")
+
+    def _watch(self):
+        while not self._stop.wait(min(self.timeout / 4, 0.5)):
+            now = time.monotonic()
+            expired = []
+            with self._lock:
+                for inner, (name, context, deadline, _, caller) in list(self._inflight.items()):
+                    if now >= deadline:
+                        del self._inflight[inner]
+                        stats = self._stats(name)
+                        stats.timeouts += 1
+                        error = TimeoutError(f"module {name} exceeded {self.timeout}s")
+                        self._fail(name, stats, error)
+                        self._results.append((name, context, error))
+                        expired.append((caller, error))
+                if expired:
+                    expired.extend(self._recycle_pool())
+                dispatched = self._dispatch()
+            self._watch_dispatched(dispatched)
+            for caller, error in expired:
+                caller.set_exception(error)
+
+    def _recycle_pool(self, reason="a worker pool restart"):
+        """Replace the pool so a hung worker stops occupying a slot.
+
+        Calls still running in the old pool are interrupted without counting
+        against their modules; returns their (caller future, error) pairs.
+        """
+        pool, self._pool = self._pool, None
+        interrupted = []
+        for inner, (name, context, _, _, caller) in list(self._inflight.items()):
+            del self._inflight[inner]
+            error = BrokenProcessPool(f"module {name} interrupted by {reason}")
+            self._results.append((name, context, error))
+            interrupted.append((caller, error))
+        if pool is not None:
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+            pool.shutdown(wait=False, cancel_futures=True)
+        return interrupted
+
+    def results(self):
+        """Return (name, context, result or exception) for calls finished since the last call"""
+        with self._lock:
+            results, self._results = self._results, []
+        return results
+
+    def report(self):
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def pending(self):
+        """Number of calls waiting for a free worker"""
+        with self._lock:
+            return len(self._pending)
+
+    def shutdown(self):
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        with self._lock:
+            pending, self._pending = list(self._pending), deque()
+            # Running hooks are killed too: a hung one would keep the interpreter alive
+            interrupted = self._recycle_pool("shutdown")
+        for _, _, _, caller in pending:
+            caller.cancel()
+        for caller, error in interrupted:
+            caller.set_exception(error)
@@ -1,19 +1,52 @@
-import wikipediaapi
-from transformers import pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
 import numpy as np
+from lazy_loader import LazyObject
+
+def _wikipedia_client():
+    import wikipediaapi
+    return wikipediaapi.Wikipedia('en')
+
+def _question_answering():
+    from transformers import pipeline
+    return pipeline("question-answering")
+
+def _vectorizer():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer()
+
+def _kmeans():
+    from sklearn.cluster import KMeans
+    return KMeans(n_clusters=3)
+
+def _pca():
+    from sklearn.decomposition import PCA
+    return PCA(n_components=2)
+
+def _scaler():
+    from sklearn.preprocessing import StandardScaler
+    return StandardScaler()
+
+def _graph():
+    import networkx as nx
+    return nx.Graph()
 
 class AdvancedAGI:
     def __init__(self):
         self.logger = self.setup_logger()
-        self.wikipedia = wikipediaapi.Wikipedia('en')
-        self.nlp_processor = pipeline("question-answering")
-        self.vectorizer = TfidfVectorizer()
-        self.kmeans = KMeans(n_clusters=3)
-        self.pca = PCA(n_components=2)
-        self.scaler = StandardScaler()
-        self.G = nx.Graph()
+        # Models and clients load on first use (or in warmup())
+        self.wikipedia = LazyObject(_wikipedia_client)
+        self.nlp_processor = LazyObject(_question_answering)
+        self.vectorizer = LazyObject(_vectorizer)
+        self.kmeans = LazyObject(_kmeans)
+        self.pca = LazyObject(_pca)
+        self.scaler = LazyObject(_scaler)
+        self.G = LazyObject(_graph)
+
+    def warmup(self):
+        # Load everything now instead of on the first request
+        for resource in (self.wikipedia, self.nlp_processor, self.vectorizer,
+                         self.kmeans, self.pca, self.scaler, self.G):
+            resource.load()
+        return self
 
     def setup_logger(self):
         # Add logger setup code here
@@ -0,0 +1,97 @@
+# response_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LRU cache of agent responses keyed on a normalized prompt, with a TTL.
+
+    Each entry remembers which reasoning stage produced it ("rule" or
+    "knowledge_graph") so that rule and graph updates can drop exactly the
+    entries whose answer they could change.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()   # key -> (expires_at, response, source)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return " ".join(prompt.lower().split())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, response, source):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, response, source)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Drop a graph-derived entry after that prompt's graph node changed"""
+        with self._lock:
+            entry = self._entries.get(key)
+            # A rule answer still wins over any graph change
+            if entry is not None and entry[2] != "rule":
+                del self._entries[key]
+                self.invalidations += 1
+
+    def invalidate_keyword(self, keyword):
+        """Drop entries a newly added rule keyword would now answer.
+
+        New rules rank after existing ones, so entries already answered by a
+        rule are unaffected.
+        """
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry[2] != "rule" and keyword in key]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
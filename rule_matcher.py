@@ -0,0 +1,159 @@
+# rule_matcher.py
+
+import threading
+from collections import deque
+from math import isqrt
+from types import MappingProxyType
+
+
+class _Automaton:
+    """Keyword trie with Aho-Corasick failure and dictionary links"""
+
+    def __init__(self):
+        self.goto = [{}]        # state -> {char: next state}
+        self.fail = [0]         # state -> failure state
+        self.out = [None]       # state -> keyword ending exactly here
+        self.dict_link = [0]    # state -> nearest failure ancestor with output
+
+    def insert(self, keyword):
+        state = 0
+        for char in keyword:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(None)
+                self.dict_link.append(0)
+                self.goto[state][char] = nxt
+            state = nxt
+        self.out[state] = keyword
+
+    def relink(self):
+        """Recompute failure and dictionary links breadth-first"""
+        goto, fail, out, dict_link = self.goto, self.fail, self.out, self.dict_link
+        queue = deque()
+        for nxt in goto[0].values():
+            fail[nxt] = 0
+            dict_link[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            for char, nxt in goto[state].items():
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                f = goto[f].get(char, 0)
+                fail[nxt] = f
+                dict_link[nxt] = f if out[f] is not None else dict_link[f]
+                queue.append(nxt)
+
+    def iter_matches(self, text):
+        goto, fail, out, dict_link = self.goto, self.fail, self.out, self.dict_link
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hit = state if out[state] is not None else dict_link[state]
+            while hit:
+                yield out[hit]
+                hit = dict_link[hit]
+
+
+class RuleMatcher:
+    """Aho-Corasick automaton over rule keywords.
+
+    Keywords added after construction go into a small secondary automaton,
+    whose links are recomputed lazily on the next match, so learning a rule
+    costs time proportional to the recent additions rather than to every
+    rule. Once the secondary automaton holds more than about the square
+    root of the rule count, it is merged into the main one with a single
+    full relink. Matching is one pass over the prompt per automaton
+    regardless of how many rules exist.
+    """
+
+    MIN_MERGE = 32  # recent keywords always tolerated before a merge
+
+    def __init__(self, keywords=()):
+        self._main = _Automaton()
+        self._recent = _Automaton()     # keywords added since the last merge
+        self._recent_keywords = []
+        self._order = {}                # keyword -> insertion order (rule priority)
+        self._main_stale = False
+        self._stale = False
+        self._build_lock = threading.Lock()
+        for keyword in keywords:
+            if keyword and keyword not in self._order:
+                self._order[keyword] = len(self._order)
+                self._main.insert(keyword)
+                self._main_stale = self._stale = True
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, keyword):
+        return keyword in self._order
+
+    def add(self, keyword: str):
+        """Insert a keyword; links are rebuilt before the next match"""
+        if not keyword or keyword in self._order:
+            return
+        self._order[keyword] = len(self._order)
+        self._recent.insert(keyword)
+        self._recent_keywords.append(keyword)
+        self._stale = True
+
+    def _build(self):
+        with self._build_lock:
+            if self._stale:
+                self._relink()
+
+    def _relink(self):
+        threshold = max(self.MIN_MERGE, isqrt(len(self._order)))
+        if self._main_stale or len(self._recent_keywords) > threshold:
+            for keyword in self._recent_keywords:
+                self._main.insert(keyword)
+            self._main.relink()
+            self._recent, self._recent_keywords = _Automaton(), []
+            self._main_stale = False
+        else:
+            self._recent.relink()
+        self._stale = False
+
+    def iter_matches(self, text: str):
+        """Yield every keyword occurring in text (repeats included)"""
+        if self._stale:
+            self._build()
+        recent = self._recent if self._recent_keywords else None
+        yield from self._main.iter_matches(text)
+        if recent is not None:
+            yield from recent.iter_matches(text)
+
+    def first_match(self, text: str):
+        """Return the earliest-added keyword found in text, or None"""
+        order = self._order
+        best = None
+        for keyword in self.iter_matches(text):
+            if best is None or order[keyword] < order[best]:
+                best = keyword
+                if order[best] == 0:
+                    break
+        return best
+
+
+class RuleSet:
+    """Read-only rules and their matcher, built once and shared between agents"""
+
+    def __init__(self, rules):
+        self.rules = MappingProxyType(dict(rules))
+        self.matcher = RuleMatcher(self.rules)
+        self.matcher._build()  # link up front so concurrent readers never rebuild
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, text: str):
+        """Return (keyword, rule) for the highest-priority rule in text, or None"""
+        keyword = self.matcher.first_match(text)
+        return None if keyword is None else (keyword, self.rules[keyword])
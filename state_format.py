@@ -0,0 +1,177 @@
+# state_format.py
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+from knowledge_graph import KnowledgeGraph
+
+MAGIC = b"VST1"
+VERSION = 1
+HEADER = struct.Struct("<4sII")         # magic, version, section count
+SECTION = struct.Struct("<16sQQ")       # name, offset, length
+SECTIONS = ("meta", "rules", "memory", "context", "graph")
+
+
+def _pack_strings(strings):
+    """String table: count, count + 1 offsets, then the UTF-8 blob"""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("Q", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    return struct.pack("<Q", len(encoded)) + offsets.tobytes() + b"".join(encoded)
+
+
+class StringTable:
+    """Read-only sequence over a packed string table, decoding on access"""
+
+    def __init__(self, buf):
+        (self._count,) = struct.unpack_from("<Q", buf)
+        end = 8 + 8 * (self._count + 1)
+        self._offsets = buf[8:end].cast("Q")
+        self._blob = buf[end:]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+
+def write_state(path, snapshot, graph):
+    """Atomically write a snapshot dict and its knowledge graph in binary form"""
+    snapshot = dict(snapshot)
+    rules = snapshot.pop("rules")
+    memory = snapshot.pop("memory")
+    context = snapshot.pop("context")
+    payloads = {
+        "meta": json.dumps(snapshot).encode("utf-8"),
+        "rules": _pack_strings([s for item in rules.items() for s in item]),
+        "memory": _pack_strings(json.dumps(entry, separators=(",", ":")) for entry in memory),
+        "context": context.encode("utf-8"),
+    }
+    table = []
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        offset = HEADER.size + SECTION.size * len(SECTIONS)
+        f.write(b"\0" * offset)
+        for name in SECTIONS:
+            offset += f.write(b"\0" * ((8 - offset % 8) % 8))
+            if name == "graph":
+                length = graph.write_to(f, max(graph.seq, snapshot.get("journal_seq", 0)))
+            else:
+                length = f.write(payloads[name])
+            table.append((name, offset, length))
+            offset += length
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(table)))
+        for name, start, length in table:
+            f.write(SECTION.pack(name.encode("ascii"), start, length))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class BinaryState:
+    """Memory-mapped binary agent state whose sections are decoded on demand"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+        magic, version, count = HEADER.unpack_from(buf)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} agent state file")
+        self._sections = {}
+        for i in range(count):
+            name, start, length = SECTION.unpack_from(buf, HEADER.size + i * SECTION.size)
+            self._sections[name.rstrip(b"\0").decode("ascii")] = buf[start:start + length]
+
+    def meta(self):
+        return json.loads(bytes(self._sections["meta"]))
+
+    def rules(self):
+        table = StringTable(self._sections["rules"])
+        return {table[i]: table[i + 1] for i in range(0, len(table), 2)}
+
+    def memory_entries(self):
+        return StringTable(self._sections["memory"])
+
+    def memory(self):
+        return [json.loads(entry) for entry in self.memory_entries()]
+
+    def context(self):
+        return bytes(self._sections["context"]).decode("utf-8")
+
+    def graph(self):
+        return KnowledgeGraph.from_buffer(self._sections["graph"], owner=self._mmap)
+
+
+class LazyState(dict):
+    """State dict whose missing keys are produced by one-shot loaders.
+
+    Keys appear in the dict only once they have been decoded, so callers that
+    need every key (such as snapshot writers) must call resolve() first.
+    """
+
+    def __init__(self, loaders, **values):
+        super().__init__(values)
+        self._loaders = dict(loaders)
+        self._lock = threading.Lock()
+
+    def __missing__(self, key):
+        with self._lock:
+            if key in self._loaders:
+                self[key] = self._loaders.pop(key)()
+            if not dict.__contains__(self, key):
+                raise KeyError(key)
+            return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        self._loaders.pop(key, None)  # an assigned value supersedes the snapshot's
+        super().__setitem__(key, value)
+
+    def is_loaded(self, key):
+        return dict.__contains__(self, key)
+
+    def resolve(self):
+        for key in list(self._loaders):
+            self[key]
+
+
+def convert_json_state(name):
+    """Convert an agent's JSON state to {name}_state.bin.
+
+    The state is loaded exactly as the agent loads it (a legacy
+    {name}_state.json, then newer {name}_state/ shards, then the journal)
+    and compacted in the binary format, which removes the JSON files.
+    """
+    from AGI import AdvancedAutonomousAI  # AGI imports this module
+
+    sources = (f"{name}_state.json", f"{name}_state", f"{name}_state.journal")
+    if not any(os.path.exists(path) for path in sources):
+        raise FileNotFoundError(f"no JSON state for agent {name}")
+    agent = AdvancedAutonomousAI(name, state_format="binary", warm_indexes=False)
+    try:
+        with agent.lock.write():
+            agent.compact_state()
+    finally:
+        agent.stop()
+    return agent.binary_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a JSON agent state to the binary format")
+    parser.add_argument("name", help="agent name, e.g. EvolvingMobileAI")
+    args = parser.parse_args()
+    print(f"Wrote {convert_json_state(args.name)}")
@@ -0,0 +1,89 @@
+# state_journal.py
+
+import json
+import os
+
+
+class StateJournal:
+    """Append-only write-ahead log of agent state mutations.
+
+    Each record is one compact JSON line ``[seq, op, *args]``. Sequence numbers
+    let a snapshot remember the last record it already contains, so replaying
+    a journal that was not truncated after a snapshot is harmless. A torn
+    final line (crash mid-write) is dropped on replay.
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.seq = 0            # last sequence number written or replayed
+        self.pending = 0        # records appended since the last snapshot
+        self._file = None
+
+    def __len__(self):
+        return self.pending
+
+    def replay(self, after=0):
+        """Yield (seq, op, args) for every intact record newer than `after`"""
+        self.seq = max(self.seq, after)
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        good = 0
+        with f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    seq, op, *args = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                if seq <= after:
+                    continue
+                self.seq = seq
+                self.pending += 1
+                yield seq, op, args
+        if good != os.path.getsize(self.path):
+            # Drop the torn tail so new records don't extend a corrupt line
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+    def append(self, op, *args):
+        """Buffer one mutation record; it is durable after flush()"""
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self.seq += 1
+        self.pending += 1
+        self._file.write(json.dumps([self.seq, op, *args], separators=(",", ":")))
+        self._file.write("\n")
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def reset(self):
+        """Truncate the journal once a snapshot covers all its records"""
+        self.close()
+        with open(self.path, "w"):
+            pass
+        self.pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+def write_atomic(path, write):
+    """Write a file via a temp file and rename so readers never see a partial copy"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,56 @@
+# state_shards.py
+
+import json
+import os
+
+from knowledge_graph import KnowledgeGraph
+from state_journal import write_atomic
+
+SECTIONS = ("rules", "memory", "context", "knowledge_graph")
+
+
+class ShardStore:
+    """Agent state stored as one file per section in a directory.
+
+    Every shard records the journal sequence number it reflects, so sections
+    can be written independently: a crash between two shard writes leaves each
+    shard consistent on its own, and replay skips the records it already has.
+    JSON sections are ``{"seq": n, "value": ...}``; the knowledge graph keeps
+    its binary form, whose header already carries the sequence number.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, section):
+        ext = "bin" if section == "knowledge_graph" else "json"
+        return os.path.join(self.directory, f"{section}.{ext}")
+
+    def load(self, section):
+        """Return (seq, value) for a stored section, or None if it has no shard"""
+        path = self.path(section)
+        if not os.path.exists(path):
+            return None
+        if section == "knowledge_graph":
+            graph = KnowledgeGraph.load(path)
+            return graph.seq, graph
+        with open(path, "r", encoding="utf-8") as f:
+            shard = json.load(f)
+        return shard["seq"], shard["value"]
+
+    def write(self, section, value, seq):
+        """Atomically replace one section's shard"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(section)
+        if section == "knowledge_graph":
+            value.save(path, seq=seq)
+        else:
+            write_atomic(path, lambda f: json.dump({"seq": seq, "value": value}, f,
+                                                   separators=(",", ":")))
+
+    def clear(self):
+        """Remove every shard (after the state moved to another format)"""
+        for section in SECTIONS:
+            path = self.path(section)
+            if os.path.exists(path):
+                os.remove(path)
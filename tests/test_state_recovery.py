@@ -0,0 +1,200 @@
+# tests/test_state_recovery.py
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AGI import AdvancedAutonomousAI  # noqa: E402
+from state_format import convert_json_state  # noqa: E402
+
+PROMPTS = [
+    "if rain then umbrella",
+    "what is the capital of france",
+    "tell me about zebras",
+    "if cold then coat",
+    "remember my name is sam",
+    "analyze the weather",
+]
+
+
+class Crash(Exception):
+    """Raised by a patched write to stop a save part way through"""
+
+
+class StateRecoveryTest(unittest.TestCase):
+    """Kill an agent at each crash point of a save and check what reloads"""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _agent(self, **options):
+        options.setdefault("memory_limit", 4)   # small, so memory spills to segments
+        options.setdefault("segment_size", 2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return AdvancedAutonomousAI("crash", warm_indexes=False, **options)
+
+    def _think(self, agent, prompts):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for prompt in prompts:
+                agent.think(prompt)
+
+    def _stop(self, agent):
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.stop()
+
+    @staticmethod
+    def _crash(agent):
+        """Abandon an agent as a killed process would: no final save"""
+        agent.scheduler.stop()
+        agent.modules.stop()
+        agent.plugins.shutdown()
+        agent.journal.close()   # records up to the crash were already flushed
+
+    @staticmethod
+    def _snapshot(agent):
+        graph = agent.state["knowledge_graph"]
+        return {
+            "memory": list(agent.iter_memory()),
+            "rules": dict(agent.state["rules"]),
+            "context": str(agent.state["context"]),
+            "graph": [graph.latest(prompt, "response") for prompt in PROMPTS],
+        }
+
+    def test_crash_between_shard_writes(self):
+        agent = self._agent(state_format="json")
+        self._think(agent, PROMPTS[:3])
+        agent.compact_state()
+        self._think(agent, PROMPTS[3:])
+        expected = self._snapshot(agent)
+
+        write, written = agent.shards.write, []
+
+        def write_two_then_crash(section, value, seq):
+            if len(written) == 2:
+                raise Crash(section)
+            written.append(section)
+            write(section, value, seq)
+
+        agent.shards.write = write_two_then_crash
+        with self.assertRaises(Crash):
+            agent.compact_state()
+        self._crash(agent)
+        self.assertEqual(written, ["rules", "memory"])
+
+        reloaded = self._agent()
+        self.assertEqual(self._snapshot(reloaded), expected)
+        self._stop(reloaded)
+
+    def test_crash_before_journal_reset(self):
+        agent = self._agent(state_format="json")
+        self._think(agent, PROMPTS)
+        expected = self._snapshot(agent)
+
+        def crash():
+            raise Crash("reset")
+
+        agent.journal.reset = crash
+        with self.assertRaises(Crash):
+            agent.compact_state()
+        self._crash(agent)
+        self.assertGreater(os.path.getsize("crash_state.journal"), 0)
+
+        # Every journal record is also in a shard now: none may apply twice
+        reloaded = self._agent()
+        self.assertEqual(self._snapshot(reloaded), expected)
+        self._think(reloaded, ["if sun then hat"])
+        expected = self._snapshot(reloaded)
+        self._stop(reloaded)
+
+        again = self._agent()
+        self.assertEqual(self._snapshot(again), expected)
+        self._stop(again)
+
+    def test_binary_json_migration(self):
+        agent = self._agent(state_format="json")
+        self._think(agent, PROMPTS[:2])
+        agent.compact_state()
+        self._think(agent, PROMPTS[2:4])
+        expected = self._snapshot(agent)
+        self._stop(agent)
+
+        binary = self._agent(state_format="binary")
+        self.assertEqual(self._snapshot(binary), expected)
+        binary.compact_state()
+        self.assertTrue(os.path.exists("crash_state.bin"))
+        self.assertFalse(os.path.exists(os.path.join("crash_state", "rules.json")))
+        self._think(binary, PROMPTS[4:])
+        expected = self._snapshot(binary)
+        self._stop(binary)
+
+        kept = self._agent()  # no format given: keeps the binary state it loaded
+        self.assertEqual(kept.state_format, "binary")
+        self.assertEqual(self._snapshot(kept), expected)
+        self._stop(kept)
+
+        back = self._agent(state_format="json")
+        self.assertEqual(self._snapshot(back), expected)
+        back.compact_state()
+        self.assertFalse(os.path.exists("crash_state.bin"))
+        self.assertTrue(os.path.exists(os.path.join("crash_state", "rules.json")))
+        self._stop(back)
+
+        final = self._agent()
+        self.assertEqual(final.state_format, "json")
+        self.assertEqual(self._snapshot(final), expected)
+        self._stop(final)
+
+    def test_convert_json_state(self):
+        agent = self._agent(state_format="json")
+        self._think(agent, PROMPTS[:3])
+        agent.compact_state()
+        self._think(agent, PROMPTS[3:])   # left in the journal only
+        expected = self._snapshot(agent)
+        self._stop(agent)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(convert_json_state("crash"), "crash_state.bin")
+        self.assertFalse(os.path.exists(os.path.join("crash_state", "rules.json")))
+        self.assertEqual(os.path.getsize("crash_state.journal"), 0)
+
+        converted = self._agent()
+        self.assertEqual(converted.state_format, "binary")
+        self.assertEqual(self._snapshot(converted), expected)
+        self._stop(converted)
+
+    def test_torn_journal_tail(self):
+        agent = self._agent(state_format="json")
+        self._think(agent, PROMPTS)
+        expected = self._snapshot(agent)
+        self._stop(agent)
+        intact = os.path.getsize("crash_state.journal")
+
+        # Crash in the middle of appending the next record
+        with open("crash_state.journal", "ab") as f:
+            f.write(b'[999,"m",{"prompt":"half wri')
+
+        reloaded = self._agent()
+        self.assertEqual(self._snapshot(reloaded), expected)
+        self.assertEqual(os.path.getsize("crash_state.journal"), intact)
+        self._think(reloaded, ["if snow then boots"])
+        expected = self._snapshot(reloaded)
+        self._stop(reloaded)
+
+        again = self._agent()
+        self.assertEqual(self._snapshot(again), expected)
+        self._stop(again)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+# wiki_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from state_journal import write_atomic
+
+
+class WikiPageCache:
+    """Local cache of Wikipedia page text in front of a wikipediaapi client.
+
+    Page text is stored zlib-compressed under the SHA-256 of its content, so
+    topics that resolve to the same page (redirects, case variants) share one
+    blob. An index maps each topic to its blob, revision id and timestamps.
+    Entries younger than `ttl` seconds are served without touching the API;
+    older ones are revalidated by revision id and only re-downloaded when the
+    page changed. Blobs beyond `max_bytes` are evicted least recently used
+    first. `client` is anything with a wikipediaapi-style page(topic) method.
+
+    Network calls run outside the cache lock, so different topics are fetched
+    concurrently; concurrent requests for one topic wait on a per-topic lock
+    and share a single fetch. Each index entry records its blob size and a
+    running total is kept, so eviction never has to stat the blob directory.
+    """
+
+    def __init__(self, client, directory=".wiki_cache", ttl=24 * 3600.0,
+                 max_bytes=256 * 2 ** 20, clock=time.time):
+        self.client = client
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._index_path = os.path.join(directory, "index.json")
+        self._lock = threading.Lock()
+        self._fetching = {}     # topic -> (lock, waiting threads) while it is fetched
+        self._dirty = False     # access times not yet written
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            index = {}
+        self._index = {}        # topic -> {"sha", "size", "revid", "fetched", "accessed"}
+        self._refs = {}         # sha -> topics using the blob
+        self._total = 0         # bytes of all referenced blobs
+        for topic, entry in index.items():
+            if entry["sha"] is not None and "size" not in entry:
+                entry["size"] = self._blob_size(entry["sha"])  # index from an older version
+            self._put(topic, entry)
+
+    def _blob_path(self, sha):
+        return os.path.join(self.directory, "blobs", f"{sha}.zz")
+
+    def _blob_size(self, sha):
+        try:
+            return os.path.getsize(self._blob_path(sha))
+        except FileNotFoundError:
+            return 0
+
+    def _read_blob(self, sha):
+        try:
+            with open(self._blob_path(sha), "rb") as f:
+                return zlib.decompress(f.read()).decode("utf-8")
+        except (FileNotFoundError, zlib.error):
+            return None
+
+    def _write_blob(self, text):
+        """Store text; returns (sha, compressed size)"""
+        data = text.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        if os.path.exists(path):
+            return sha, self._blob_size(sha)
+        data = zlib.compress(data, 6)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return sha, len(data)
+
+    def _put(self, topic, entry):
+        """Point topic at entry, keeping blob refcounts and the byte total; call with the lock held"""
+        old = self._index.pop(topic, None)
+        self._index[topic] = entry
+        sha = entry["sha"]
+        if sha is not None:
+            if not self._refs.get(sha):
+                self._total += entry["size"]
+            self._refs[sha] = self._refs.get(sha, 0) + 1
+        if old is not None and self._unref(old):
+            self._remove_blob(old["sha"])  # replaced by a different revision
+
+    def _unref(self, entry):
+        """Drop one reference to entry's blob; returns True if nothing uses it now"""
+        sha = entry["sha"]
+        if sha is None:
+            return False
+        self._refs[sha] -= 1
+        if self._refs[sha]:
+            return False
+        del self._refs[sha]
+        self._total -= entry["size"]
+        return True
+
+    def _remove_blob(self, sha):
+        try:
+            os.remove(self._blob_path(sha))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def _topic_lock(self, topic):
+        with self._lock:
+            lock, waiting = self._fetching.get(topic, (None, 0))
+            self._fetching[topic] = (lock or threading.Lock(), waiting + 1)
+            lock = self._fetching[topic][0]
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                waiting = self._fetching[topic][1] - 1
+                if waiting:
+                    self._fetching[topic] = (lock, waiting)
+                else:
+                    del self._fetching[topic]
+
+    def get(self, topic):
+        """Return the page text for topic, or None if the page does not exist"""
+        found, text = self._cached(topic)
+        if found:
+            return text
+        with self._topic_lock(topic):
+            found, text = self._cached(topic)  # fetched while we waited
+            if found:
+                return text
+            return self._fetch(topic)
+
+    def _cached(self, topic):
+        """(True, text) for a fresh cached entry, else (False, None)"""
+        with self._lock:
+            now = self.clock()
+            entry = self._index.get(topic)
+            if entry is None or now - entry["fetched"] >= self.ttl:
+                return False, None
+            sha = entry["sha"]
+        text = None if sha is None else self._read_blob(sha)
+        if sha is not None and text is None:
+            return False, None  # blob lost or evicted: fetch again
+        with self._lock:
+            self.hits += 1
+            entry["accessed"] = now
+            self._dirty = True
+        return True, text
+
+    def _fetch(self, topic):
+        """Fetch topic from the API; call with the topic's lock held"""
+        with self._lock:
+            entry = self._index.get(topic)
+            entry = dict(entry) if entry is not None else None
+        page = self.client.page(topic)
+        if not page.exists():
+            now = self.clock()
+            with self._lock:
+                self.misses += 1
+                self._put(topic, {"sha": None, "size": 0, "revid": None,
+                                  "fetched": now, "accessed": now})
+                self._save()
+            return None
+        revid = getattr(page, "lastrevid", None)
+        if (entry is not None and entry["sha"] is not None and revid is not None
+                and revid == entry["revid"]):
+            text = self._read_blob(entry["sha"])
+            if text is not None:
+                # Unchanged upstream: extend the entry without downloading the text
+                now = self.clock()
+                entry.update(fetched=now, accessed=now)
+                with self._lock:
+                    self.revalidations += 1
+                    self._put(topic, entry)
+                    self._save()
+                return text
+        text = page.text
+        sha, size = self._write_blob(text)
+        now = self.clock()
+        with self._lock:
+            self.misses += 1
+            self._put(topic, {"sha": sha, "size": size, "revid": revid,
+                              "fetched": now, "accessed": now})
+            self._evict()
+            self._save()
+        return text
+
+    def _evict(self):
+        """Drop least recently used topics until the blobs fit in max_bytes; call with the lock held"""
+        if self._total <= self.max_bytes:
+            return
+        for topic, entry in sorted(self._index.items(), key=lambda item: item[1]["accessed"]):
+            if self._total <= self.max_bytes:
+                break
+            del self._index[topic]
+            if self._unref(entry):
+                self._remove_blob(entry["sha"])
+
+    def _save(self):
+        index = dict(self._index)
+        write_atomic(self._index_path, lambda f: json.dump(index, f, separators=(",", ":")))
+        self._dirty = False
+
+    def flush(self):
+        """Persist access times recorded by cache hits"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "revalidations": self.revalidations,
+                "topics": len(self._index), "bytes": self._total}